@@ -508,7 +508,7 @@ async def get_current_user(
 # ROTAS
 # ======================================================
 @router.post("/token", response_model=Token)
-async def login_for_access_token(
+def login_for_access_token(
     user_credentials: UserLogin,
     db: Session = Depends(get_db),
 ):
@@ -544,7 +544,7 @@ async def login_for_access_token(
 
 
 @router.post("/login")
-async def login_set_cookie(
+def login_set_cookie(
     user_credentials: UserLogin,
     response: Response,
     db: Session = Depends(get_db),
@@ -617,7 +617,7 @@ def _default_password_motoboy(sub_base: Optional[str]) -> str:
 
 
 @router.post("/motoboy-login")
-async def motoboy_login(
+def motoboy_login(
     body: MotoboyLogin,
     db: Session = Depends(get_db),
 ):
@@ -703,7 +703,7 @@ async def motoboy_login(
 
 
 @router.post("/motoboy-select-subbase", response_model=Token)
-async def motoboy_select_subbase(
+def motoboy_select_subbase(
     body: MotoboySelectSubBase,
     db: Session = Depends(get_db),
 ):
@@ -777,13 +777,13 @@ async def motoboy_select_subbase(
 
 
 @router.post("/motoboy-refresh", response_model=Token)
-async def motoboy_refresh(body: MotoboyRefreshBody, db: Session = Depends(get_db)):
+def motoboy_refresh(body: MotoboyRefreshBody, db: Session = Depends(get_db)):
     """Renova access token usando refresh token (app mobile)."""
     return _rotate_motoboy_refresh_token(db, body.refresh_token)
 
 
 @router.post("/motoboy-logout")
-async def motoboy_logout(body: MotoboyLogoutBody, db: Session = Depends(get_db)):
+def motoboy_logout(body: MotoboyLogoutBody, db: Session = Depends(get_db)):
     """Revoga refresh token do motoboy (logout manual app mobile)."""
     if body.refresh_token:
         token_hash = _hash_refresh_token(body.refresh_token.strip())
@@ -815,7 +815,7 @@ def _nome_exibicao(user: User) -> tuple[Optional[str], Optional[str]]:
 
 
 @router.get("/me", response_model=UserResponse)
-async def read_users_me(
+def read_users_me(
     request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -856,7 +856,7 @@ class ResetPasswordPayload(BaseModel):
 
 
 @router.post("/reset-password")
-async def reset_password(payload: ResetPasswordPayload, db: Session = Depends(get_db)):
+def reset_password(payload: ResetPasswordPayload, db: Session = Depends(get_db)):
     user = get_user_by_identifier(db, payload.identifier)
     if not user:
         raise HTTPException(404, "Usuário não encontrado")
@@ -1,14 +1,16 @@
 # base.py
 from __future__ import annotations
 
-from typing import Optional, List
+import time
+from typing import Dict, List, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from pydantic import BaseModel, Field, ConfigDict
-from sqlalchemy import select
+from sqlalchemy import case, or_, select
 from sqlalchemy.orm import Session
 
 from db import get_db
 from auth import get_current_user
+from coletas import _descartar_usuario, _guardar_em_cache, invalidar_cache_precos
 from models import User, BasePreco  # classe do models.py com __tablename__ = "base"
 
 router = APIRouter(prefix="/base", tags=["Base"])
@@ -49,22 +51,49 @@ class BaseUpdate(BaseModel):
 # =========================
 # Helper
 # =========================
+# Cache curto por processo (usado também pelo dashboard e pela listagem de usuários a cada
+# request). Edição/exclusão de usuário invalida a entrada.
+_USER_SUB_BASE_CACHE_TTL_S = 300.0
+_USER_SUB_BASE_CACHE_MAX = 1024
+_user_sub_base_cache: Dict[tuple, Tuple[float, str]] = {}
+
+
+def invalidar_cache_user_sub_base(user_id: Optional[int], *identificadores: Optional[str]) -> None:
+    """Chamado pelas rotas de usuário após commit (edição/exclusão): descarta a sub_base cacheada."""
+    _descartar_usuario(_user_sub_base_cache, user_id, *identificadores)
+
+
 def _resolve_user_sub_base(db: Session, current_user: User) -> str:
+    # Um único SELECT só da coluna sub_base; a prioridade id > email > username
+    # do fallback antigo fica no ORDER BY.
     user_id = getattr(current_user, "id", None)
-    if user_id is not None:
-        u = db.get(User, user_id)
-        if u and getattr(u, "sub_base", None):
-            return u.sub_base
     email = getattr(current_user, "email", None)
-    if email:
-        u = db.scalars(select(User).where(User.email == email)).first()
-        if u and getattr(u, "sub_base", None):
-            return u.sub_base
     username = getattr(current_user, "username", None)
-    if username:
-        u = db.scalars(select(User).where(User.username == username)).first()
-        if u and getattr(u, "sub_base", None):
-            return u.sub_base
+    key = (user_id, email, username)
+    hit = _user_sub_base_cache.get(key)
+    if hit and hit[0] > time.time():
+        return hit[1]
+
+    conds = [c for c in (
+        User.id == user_id if user_id is not None else None,
+        User.email == email if email else None,
+        User.username == username if username else None,
+    ) if c is not None]
+    if conds:
+        sub_base = db.scalar(
+            select(User.sub_base)
+            .where(or_(*conds), User.sub_base.isnot(None), User.sub_base != "")
+            .order_by(case(*((cond, i) for i, cond in enumerate(conds)), else_=len(conds)))
+            .limit(1)
+        )
+        if sub_base:
+            _guardar_em_cache(
+                _user_sub_base_cache,
+                key,
+                (time.time() + _USER_SUB_BASE_CACHE_TTL_S, sub_base),
+                _USER_SUB_BASE_CACHE_MAX,
+            )
+            return sub_base
     raise HTTPException(status_code=401, detail="Usuário sem 'sub_base' definida em 'users'.")
 
 # =========================
@@ -209,6 +238,7 @@ def patch_base(
         obj.ativo = bool(body.ativo)
 
     db.commit()
+    invalidar_cache_precos(sub_base_user)
     db.refresh(obj)
     return obj
 
@@ -227,4 +257,5 @@ def delete_base(
         raise HTTPException(status_code=404, detail="Não encontrado")
     db.delete(obj)
     db.commit()
+    invalidar_cache_precos(sub_base_user)
     return
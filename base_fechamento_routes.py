@@ -9,11 +9,12 @@ from __future__ import annotations
 
 from datetime import date, datetime
 from decimal import Decimal
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
-from sqlalchemy import func, select
+from sqlalchemy import Date, and_, case, func, select
 from sqlalchemy.orm import Session
 
 from db import get_db
@@ -29,7 +30,14 @@ from models import (
     User,
 )
 
-from coletas import _decimal, _get_precos_cached, _sub_base_from_token_or_422
+from coletas import (
+    _centavos,
+    _de_centavos,
+    _decimal,
+    _get_precos_cached,
+    _sub_base_from_token_or_422,
+    invalidar_cache_resumo,
+)
 
 router = APIRouter(prefix="/fechamentos", tags=["Fechamentos Bases"])
 
@@ -143,6 +151,7 @@ def _emitido_por(db: Session, sub_base: str) -> str:
     return (owner.sub_base or "").strip() or "Tracking Saídas"
 
 
+@lru_cache(maxsize=64)
 def _normalizar_servico_saida(serv: str) -> str:
     """Mapeia Saida.servico para shopee | ml | avulso."""
     s = (serv or "").lower().strip()
@@ -166,89 +175,76 @@ def _build_itens_e_valores(
     """
     base_norm = base.strip()
     base_key = base_norm.upper()
-    from datetime import time as dt_time
+    from datetime import time as dt_time, timedelta
     dt_start = datetime.combine(periodo_inicio, dt_time.min)
-    dt_end = datetime.combine(periodo_fim, dt_time(23, 59, 59))
-
-    # Coletas: agrupar por (data, base)
-    stmt_coletas = select(Coleta).where(
-        Coleta.sub_base == sub_base,
-        func.upper(Coleta.base) == base_key,
-        Coleta.timestamp >= dt_start,
-        Coleta.timestamp <= dt_end,
-    ).where(
-        (Coleta.shopee > 0) | (Coleta.mercado_livre > 0) | (Coleta.avulso > 0) | (Coleta.valor_total > 0)
+    # Fim exclusivo (dia seguinte 00:00): inclui 23:59:59.x, que o <= 23:59:59 deixava de fora
+    dt_end = datetime.combine(periodo_fim + timedelta(days=1), dt_time.min)
+
+    # Coletas: somas por dia direto no banco (manuais e codigo juntas).
+    # G da coleta manual: g_shopee, g_ml, g_avulso quando existirem; senão pacotes_g cai em avulso.
+    dia_coleta = func.date(Coleta.timestamp, type_=Date)
+    sem_g_servico = and_(Coleta.g_shopee == 0, Coleta.g_ml == 0, Coleta.g_avulso == 0)
+    g_avulso_coleta = case(
+        (sem_g_servico, case((Coleta.pacotes_g > 0, Coleta.pacotes_g), else_=0)),
+        else_=Coleta.g_avulso,
     )
-    rows_coletas = db.scalars(stmt_coletas).all()
-
-    # Cancelados: Saidas com status cancelado, agrupar por (data, base, servico)
-    stmt_canc = select(Saida).where(
-        Saida.sub_base == sub_base,
-        func.lower(Saida.status) == "cancelado",
-    )
-    if base_norm:
-        stmt_canc = stmt_canc.where(func.upper(Saida.base) == base_key)
-    stmt_canc = stmt_canc.where(
-        Saida.data >= periodo_inicio,
-        Saida.data <= periodo_fim,
+    stmt_coletas = (
+        select(
+            dia_coleta,
+            func.sum(Coleta.shopee),
+            func.sum(Coleta.mercado_livre),
+            func.sum(Coleta.avulso),
+            func.sum(Coleta.g_shopee),
+            func.sum(Coleta.g_ml),
+            func.sum(g_avulso_coleta),
+        )
+        .where(
+            Coleta.sub_base == sub_base,
+            func.upper(Coleta.base) == base_key,
+            Coleta.timestamp >= dt_start,
+            Coleta.timestamp < dt_end,
+        )
+        .where(
+            (Coleta.shopee > 0) | (Coleta.mercado_livre > 0) | (Coleta.avulso > 0) | (Coleta.valor_total > 0)
+        )
+        .group_by(dia_coleta)
     )
-    rows_canc = db.scalars(stmt_canc).all()
 
-    # Mapa coletas por data (agrupar manuais e codigo)
     mapa_coletas: dict[str, dict] = {}
-    for r in rows_coletas:
-        dia = r.timestamp.date().isoformat()
-        if dia not in mapa_coletas:
-            mapa_coletas[dia] = {"shopee": 0, "mercado_livre": 0, "avulso": 0}
-        mapa_coletas[dia]["shopee"] += r.shopee or 0
-        mapa_coletas[dia]["mercado_livre"] += r.mercado_livre or 0
-        mapa_coletas[dia]["avulso"] += r.avulso or 0
-
-    # Mapa cancelados por data e tipo
-    mapa_canc: dict[str, dict] = {}
-    for c in rows_canc:
-        dia = (c.data or c.timestamp.date()).isoformat()
-        tipo = _normalizar_servico_saida(c.servico or "")
-        if dia not in mapa_canc:
-            mapa_canc[dia] = {"shopee": 0, "ml": 0, "avulso": 0}
-        mapa_canc[dia][tipo] = mapa_canc[dia].get(tipo, 0) + 1
-
-    # Pacotes G: Saidas com is_grande, agrupar por data e serviço (como cancelados)
-    stmt_g = select(Saida).where(
+    mapa_g: dict[str, dict] = {}
+    for dia_d, shopee, ml, avulso, g_s, g_m, g_a in db.execute(stmt_coletas).all():
+        dia = dia_d.isoformat()
+        mapa_coletas[dia] = {"shopee": shopee or 0, "mercado_livre": ml or 0, "avulso": avulso or 0}
+        mapa_g[dia] = {"shopee": g_s or 0, "ml": g_m or 0, "avulso": g_a or 0}
+
+    # Cancelados e pacotes G (Saida.is_grande): uma contagem por (data, servico) para os dois
+    cancelado = func.lower(Saida.status) == "cancelado"
+    grande = Saida.is_grande.is_(True)
+    stmt_saidas = select(
+        Saida.data,
+        Saida.servico,
+        func.count().filter(cancelado),
+        func.count().filter(grande),
+    ).where(
         Saida.sub_base == sub_base,
-        Saida.is_grande.is_(True),
-    )
-    if base_norm:
-        stmt_g = stmt_g.where(func.upper(Saida.base) == base_key)
-    stmt_g = stmt_g.where(
+        cancelado | grande,
         Saida.data >= periodo_inicio,
         Saida.data <= periodo_fim,
     )
-    rows_g = db.scalars(stmt_g).all()
-    mapa_g: dict[str, dict] = {}
-    for g in rows_g:
-        dia = (g.data or g.timestamp.date()).isoformat()
-        tipo = _normalizar_servico_saida(g.servico or "")
-        if dia not in mapa_g:
-            mapa_g[dia] = {"shopee": 0, "ml": 0, "avulso": 0}
-        mapa_g[dia][tipo] = mapa_g[dia].get(tipo, 0) + 1
-
-    # Pacotes G vindos de Coleta (coleta manual): usar g_shopee, g_ml, g_avulso quando existirem; senão fallback em avulso
-    for r in rows_coletas:
-        dia = r.timestamp.date().isoformat()
-        g_s = getattr(r, "g_shopee", 0) or 0
-        g_m = getattr(r, "g_ml", 0) or 0
-        g_a = getattr(r, "g_avulso", 0) or 0
-        if g_s == 0 and g_m == 0 and g_a == 0:
-            qtd = getattr(r, "pacotes_g", 0) or 0
-            if qtd <= 0:
-                continue
-            g_a = qtd
-        if dia not in mapa_g:
-            mapa_g[dia] = {"shopee": 0, "ml": 0, "avulso": 0}
-        mapa_g[dia]["shopee"] = mapa_g[dia].get("shopee", 0) + g_s
-        mapa_g[dia]["ml"] = mapa_g[dia].get("ml", 0) + g_m
-        mapa_g[dia]["avulso"] = mapa_g[dia].get("avulso", 0) + g_a
+    if base_norm:
+        stmt_saidas = stmt_saidas.where(func.upper(Saida.base) == base_key)
+    stmt_saidas = stmt_saidas.group_by(Saida.data, Saida.servico)
+
+    mapa_canc: dict[str, dict] = {}
+    for data_saida, servico, qtd_canc, qtd_g in db.execute(stmt_saidas).all():
+        dia = data_saida.isoformat()
+        tipo = _normalizar_servico_saida(servico or "")
+        if qtd_canc:
+            canc = mapa_canc.setdefault(dia, {"shopee": 0, "ml": 0, "avulso": 0})
+            canc[tipo] += qtd_canc
+        if qtd_g:
+            g_map = mapa_g.setdefault(dia, {"shopee": 0, "ml": 0, "avulso": 0})
+            g_map[tipo] += qtd_g
 
     # Dias únicos (coletas + cancelados + G)
     dias_set = set(mapa_coletas.keys()) | set(mapa_canc.keys()) | set(mapa_g.keys())
@@ -259,10 +255,12 @@ def _build_itens_e_valores(
         p_shopee, p_ml, p_avulso = _get_precos_cached(db, sub_base, base_norm)
     except HTTPException:
         p_shopee = p_ml = p_avulso = Decimal("0.00")
+    # Soma por dia em centavos inteiros; Decimal só no retorno
+    c_shopee, c_ml, c_avulso = _centavos(p_shopee), _centavos(p_ml), _centavos(p_avulso)
 
     itens = []
-    valor_bruto = Decimal("0.00")
-    valor_cancelados = Decimal("0.00")
+    bruto_centavos = 0
+    canc_centavos = 0
 
     for dia in sorted(dias_set):
         c = mapa_coletas.get(dia, {})
@@ -279,11 +277,8 @@ def _build_itens_e_valores(
         g_a = g_map.get("avulso", 0)
         pacotes_g = g_s + g_m + g_a
 
-        v_bruto = (_decimal(shopee) * p_shopee + _decimal(ml) * p_ml + _decimal(avulso) * p_avulso).quantize(Decimal("0.01"))
-        v_canc = (_decimal(canc_s) * p_shopee + _decimal(canc_ml) * p_ml + _decimal(canc_a) * p_avulso).quantize(Decimal("0.01"))
-
-        valor_bruto += v_bruto
-        valor_cancelados += v_canc
+        bruto_centavos += shopee * c_shopee + ml * c_ml + avulso * c_avulso
+        canc_centavos += canc_s * c_shopee + canc_ml * c_ml + canc_a * c_avulso
 
         itens.append({
             "data": dia,
@@ -299,7 +294,9 @@ def _build_itens_e_valores(
             "g_avulso": g_a,
         })
 
-    valor_final = (valor_bruto - valor_cancelados).quantize(Decimal("0.01"))
+    valor_bruto = _de_centavos(bruto_centavos)
+    valor_cancelados = _de_centavos(canc_centavos)
+    valor_final = _de_centavos(bruto_centavos - canc_centavos)
     return itens, valor_bruto, valor_cancelados, valor_final
 
 
@@ -548,18 +545,18 @@ def criar_fechamento(
 
     if payload.itens:
         itens_data = payload.itens
-        valor_bruto = Decimal("0.00")
-        valor_cancelados = Decimal("0.00")
         try:
             p_s, p_m, p_a = _get_precos_cached(db, sub_base, base_norm)
         except HTTPException:
             p_s = p_m = p_a = Decimal("0.00")
-        for it in itens_data:
-            v_bruto = _decimal(it.shopee) * p_s + _decimal(it.mercado_livre) * p_m + _decimal(it.avulso) * p_a
-            v_canc = _decimal(it.cancelados_shopee) * p_s + _decimal(it.cancelados_ml) * p_m + _decimal(it.cancelados_avulso) * p_a
-            valor_bruto += v_bruto
-            valor_cancelados += v_canc
-        valor_final_calc = (valor_bruto - valor_cancelados).quantize(Decimal("0.01"))
+        c_s, c_m, c_a = _centavos(p_s), _centavos(p_m), _centavos(p_a)
+        bruto_centavos = sum(it.shopee * c_s + it.mercado_livre * c_m + it.avulso * c_a for it in itens_data)
+        canc_centavos = sum(
+            it.cancelados_shopee * c_s + it.cancelados_ml * c_m + it.cancelados_avulso * c_a for it in itens_data
+        )
+        valor_bruto = _de_centavos(bruto_centavos)
+        valor_cancelados = _de_centavos(canc_centavos)
+        valor_final_calc = _de_centavos(bruto_centavos - canc_centavos)
     else:
         itens_data, valor_bruto, valor_cancelados, valor_final_calc = _build_itens_e_valores(
             db, sub_base, base_norm, payload.periodo_inicio, payload.periodo_fim
@@ -629,6 +626,7 @@ def criar_fechamento(
         db.add(item)
 
     db.commit()
+    invalidar_cache_resumo(sub_base)
     db.refresh(fech)
 
     total_g_shopee = sum(getattr(it, "g_shopee", 0) or 0 for it in itens_data)
@@ -790,13 +788,13 @@ def atualizar_fechamento(
     except HTTPException:
         p_s = p_m = p_a = Decimal("0.00")
 
-    valor_bruto = Decimal("0.00")
-    valor_cancelados = Decimal("0.00")
-    for it in payload.itens:
-        v_bruto = _decimal(it.shopee) * p_s + _decimal(it.mercado_livre) * p_m + _decimal(it.avulso) * p_a
-        v_canc = _decimal(it.cancelados_shopee) * p_s + _decimal(it.cancelados_ml) * p_m + _decimal(it.cancelados_avulso) * p_a
-        valor_bruto += v_bruto
-        valor_cancelados += v_canc
+    c_s, c_m, c_a = _centavos(p_s), _centavos(p_m), _centavos(p_a)
+    valor_bruto = _de_centavos(
+        sum(it.shopee * c_s + it.mercado_livre * c_m + it.avulso * c_a for it in payload.itens)
+    )
+    valor_cancelados = _de_centavos(
+        sum(it.cancelados_shopee * c_s + it.cancelados_ml * c_m + it.cancelados_avulso * c_a for it in payload.itens)
+    )
 
     if payload.valor_adicao is not None:
         fech.valor_adicao = Decimal(str(payload.valor_adicao)).quantize(Decimal("0.01"))
@@ -840,6 +838,7 @@ def atualizar_fechamento(
         db.add(item)
 
     db.commit()
+    invalidar_cache_resumo(sub_base)
     db.refresh(fech)
 
     itens = db.scalars(
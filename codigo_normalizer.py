@@ -7,7 +7,8 @@ from __future__ import annotations
 
 import json
 import re
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Optional
 
 # DDDs válidos no Brasil (sem 23, 25, 26, 29, 36, 39, 40, 50, 52, 70, 90)
 _DDD_VALIDOS = frozenset(
@@ -25,21 +26,41 @@ _DDD_VALIDOS = frozenset(
 )
 
 _AVULSO_CODIGO_RE = re.compile(r"^AVULSO(-[A-Z0-9-]+)?$")
+_NAO_DIGITOS_RE = re.compile(r"\D+")
+_SHOPEE_EMBUTIDO_RE = re.compile(r"(?:^|[^A-Z0-9])(BR(?:\d{13}|\d{12}[A-Z]))(?=$|[^A-Z0-9])", re.I)
+_ML_RUN_RE = re.compile(r"4[5-9]\d{9,}")
+_ML_PALAVRA_RE = re.compile(r"\bml\b")
+_EXTERNAL_ORDER_ID_RE = re.compile(r'external_order_id["\']?\s*[:=]\s*["\']?([\w-]+)', re.I)
+
+# Superscript e fullwidth -> ASCII, aplicado com um único str.translate por chamada.
+_ASCII_DIGITS_TABLE = str.maketrans(
+    {
+        **{sup: str(i) for i, sup in enumerate("⁰¹²³⁴⁵⁶⁷⁸⁹")},
+        **{chr(0xFF10 + i): str(i) for i in range(10)},
+    }
+)
 
 
 def _to_ascii_digits(s: str) -> str:
     """Converte dígitos unicode (superscript, fullwidth) para ASCII."""
     if not s:
         return ""
-    sup_map = {
-        "⁰": "0", "¹": "1", "²": "2", "³": "3", "⁴": "4",
-        "⁵": "5", "⁶": "6", "⁷": "7", "⁸": "8", "⁹": "9",
-    }
-    for k, v in sup_map.items():
-        s = s.replace(k, v)
-    for i in range(10):
-        s = s.replace(chr(0xFF10 + i), str(i))
-    return s
+    return s.translate(_ASCII_DIGITS_TABLE)
+
+
+@lru_cache(maxsize=256)
+def _parse_json_payload(raw_input_str: str) -> Any:
+    """
+    json.loads de payload QR no formato {...}; None se não for objeto JSON válido.
+    Memoizado: o scan pela câmera chama is_qr_like_scan_payload e normalize_codigo
+    com o mesmo payload, e o parse passa a acontecer uma vez só. Os chamadores só leem o dict.
+    """
+    if not (raw_input_str[:1] == "{" and raw_input_str[-1:] == "}"):
+        return None
+    try:
+        return json.loads(raw_input_str)
+    except (json.JSONDecodeError, TypeError):
+        return None
 
 
 def _is_codigo_shopee(codigo: str) -> bool:
@@ -47,7 +68,10 @@ def _is_codigo_shopee(codigo: str) -> bool:
     if not codigo or not isinstance(codigo, str):
         return False
     c = codigo.upper().strip()
-    return bool(re.match(r"^BR(\d{13}|\d{12}[A-Z])$", c))
+    # Formato fixo de 15 posições: checagem direta por fatia (isdecimal == \d do regex).
+    if len(c) != 15 or not c.startswith("BR"):
+        return False
+    return c[2:14].isdecimal() and (c[14].isdecimal() or "A" <= c[14] <= "Z")
 
 
 def _normalize_shopee_codigo(raw: str, all_digits: str) -> Optional[str]:
@@ -56,11 +80,11 @@ def _normalize_shopee_codigo(raw: str, all_digits: str) -> Optional[str]:
     if _is_codigo_shopee(text):
         return text
 
-    sh_match = re.search(r"(?:^|[^A-Z0-9])(BR(?:\d{13}|\d{12}[A-Z]))(?=$|[^A-Z0-9])", text, re.I)
+    sh_match = _SHOPEE_EMBUTIDO_RE.search(text)
     if sh_match:
         return sh_match.group(1).upper()
 
-    digits = re.sub(r"\D+", "", all_digits or text)
+    digits = _NAO_DIGITOS_RE.sub("", all_digits or text)
     if len(digits) in (12, 13) and digits.isdigit():
         candidate = f"BR{digits}"
         if _is_codigo_shopee(candidate):
@@ -76,15 +100,17 @@ def _normalize_shopee_codigo(raw: str, all_digits: str) -> Optional[str]:
 
 def _is_codigo_avulso_gerado(raw: str) -> bool:
     """Código avulso gerado pelo sistema (ex.: AVULSO-9JULHO-000019 ou AVULSO-000019)."""
-    return bool(_AVULSO_CODIGO_RE.match(_to_ascii_digits(str(raw or "")).upper().strip()))
+    s = _to_ascii_digits(str(raw or "")).upper().strip()
+    # Prefixo fixo: a maioria das leituras nem começa com AVULSO e não precisa do regex.
+    return s.startswith("AVULSO") and bool(_AVULSO_CODIGO_RE.match(s))
 
 
 def _extract_ml_codigo(value: str) -> Optional[str]:
     """Extrai código Mercado Livre (45-49) normalizado para 11 dígitos."""
     if not value:
         return None
-    digits = re.sub(r"\D+", "", _to_ascii_digits(str(value)))
-    ml_run = re.search(r"4[5-9]\d{9,}", digits)
+    digits = _NAO_DIGITOS_RE.sub("", _to_ascii_digits(str(value)))
+    ml_run = _ML_RUN_RE.search(digits)
     if not ml_run:
         return None
     return ml_run.group(0)[:11]
@@ -95,7 +121,7 @@ def _is_telefone_brasil(raw: str, all_digits: Optional[str] = None) -> Optional[
     Valida telefone BR (DDD + número). Retorna só dígitos (10 ou 11) ou None.
     Não aceita 12+ dígitos (prioridade Shopee).
     """
-    digits = re.sub(r"\D+", "", all_digits if all_digits is not None else _to_ascii_digits(str(raw or "")))
+    digits = _NAO_DIGITOS_RE.sub("", all_digits if all_digits is not None else _to_ascii_digits(str(raw or "")))
     if not digits:
         return None
     if len(digits) in (12, 13) and digits.startswith("55"):
@@ -122,7 +148,7 @@ def canonicalize_servico(servico: Optional[str]) -> str:
     s = (servico or "").strip().lower()
     if "shopee" in s:
         return "Shopee"
-    if "mercado" in s or "flex" in s or re.search(r"\bml\b", s):
+    if "mercado" in s or "flex" in s or _ML_PALAVRA_RE.search(s):
         return "Mercado Livre"
     return "Avulso"
 
@@ -133,25 +159,24 @@ def is_qr_like_scan_payload(raw_input: str) -> bool:
     if not raw_input_str:
         return False
     raw = _to_ascii_digits(raw_input_str).upper().strip()
-    all_digits = re.sub(r"\D+", "", raw)
+    all_digits = _NAO_DIGITOS_RE.sub("", raw)
 
     if raw_input_str.startswith("{") and raw_input_str.endswith("}"):
-        try:
-            obj = json.loads(raw_input_str)
-            if isinstance(obj, dict):
-                if obj.get("external_order_id") or obj.get("EXTERNAL_ORDER_ID"):
-                    return True
-                if obj.get("id") is not None and (
-                    obj.get("sender_id") is not None
-                    or obj.get("SENDER_ID") is not None
-                    or obj.get("hash_code") is not None
-                    or obj.get("HASH_CODE") is not None
-                ):
-                    return True
-        except (json.JSONDecodeError, TypeError):
+        obj = _parse_json_payload(raw_input_str)
+        if obj is None:
             return False
-
-    if re.search(r'external_order_id["\']?\s*[:=]\s*["\']?([\w-]+)', raw, re.I):
+        if isinstance(obj, dict):
+            if obj.get("external_order_id") or obj.get("EXTERNAL_ORDER_ID"):
+                return True
+            if obj.get("id") is not None and (
+                obj.get("sender_id") is not None
+                or obj.get("SENDER_ID") is not None
+                or obj.get("hash_code") is not None
+                or obj.get("HASH_CODE") is not None
+            ):
+                return True
+
+    if _EXTERNAL_ORDER_ID_RE.search(raw):
         return True
     if _normalize_shopee_codigo(raw, all_digits):
         return True
@@ -165,7 +190,7 @@ def is_qr_like_scan_payload(raw_input: str) -> bool:
 def _classify_codigo_text(codigo_raw: str, strict_qr: bool = False) -> tuple[Optional[str], Optional[str]]:
     """Classifica um código textual em serviço canônico."""
     raw = _to_ascii_digits(str(codigo_raw or "")).upper().strip()
-    all_digits = re.sub(r"\D+", "", raw)
+    all_digits = _NAO_DIGITOS_RE.sub("", raw)
 
     shopee = _normalize_shopee_codigo(raw, all_digits)
     if shopee:
@@ -198,18 +223,18 @@ def normalize_codigo(raw_input: str, strict_qr: bool = False) -> tuple[Optional[
     """
     raw_input_str = (raw_input or "").strip()
     raw = _to_ascii_digits(raw_input_str).upper().strip()
-    all_digits = re.sub(r"\D+", "", raw)
-    json_obj = None
-    is_json_payload = raw_input_str.startswith("{") and raw_input_str.endswith("}")
 
-    if is_json_payload:
-        try:
-            json_obj = json.loads(raw_input_str)
-        except (json.JSONDecodeError, TypeError):
-            json_obj = None
+    # Caso mais frequente no scan: etiqueta Shopee lida limpa (BR + 13 dígitos / 12 + letra).
+    # Nenhuma prioridade anterior (JSON, external_order_id, NF-e) casa com esse formato exato,
+    # então retornar aqui preserva o resultado e evita as tentativas que sempre falhariam.
+    if _is_codigo_shopee(raw):
+        return raw, "Shopee", None
+
+    all_digits = _NAO_DIGITOS_RE.sub("", raw)
+    json_obj = _parse_json_payload(raw_input_str)
 
-    # PRIORIDADE 0 — Mercado Livre JSON (id e/ou marcadores sender/hash)
     if isinstance(json_obj, dict):
+        # PRIORIDADE 0 — Mercado Livre JSON (id e/ou marcadores sender/hash)
         raw_id = json_obj.get("id")
         if raw_id is not None:
             id_str = str(raw_id).strip()
@@ -221,8 +246,7 @@ def normalize_codigo(raw_input: str, strict_qr: bool = False) -> tuple[Optional[
             if id_str and (has_ml_markers or ml_id):
                 return (ml_id or id_str), "Mercado Livre", raw_input_str
 
-    # PRIORIDADE 1 — QRCode JSON com external_order_id
-    if isinstance(json_obj, dict):
+        # PRIORIDADE 1 — QRCode JSON com external_order_id
         eoid = json_obj.get("external_order_id") or json_obj.get("EXTERNAL_ORDER_ID")
         if isinstance(eoid, str):
             codigo, servico = _classify_codigo_text(eoid, strict_qr=strict_qr)
@@ -231,7 +255,7 @@ def normalize_codigo(raw_input: str, strict_qr: bool = False) -> tuple[Optional[
             return codigo, servico, None
 
     # PRIORIDADE 2 — external_order_id fora de JSON
-    ext_match = re.search(r'external_order_id["\']?\s*[:=]\s*["\']?([\w-]+)', raw, re.I)
+    ext_match = _EXTERNAL_ORDER_ID_RE.search(raw)
     if ext_match:
         codigo, servico = _classify_codigo_text(ext_match.group(1), strict_qr=strict_qr)
         if codigo is None:
@@ -239,7 +263,7 @@ def normalize_codigo(raw_input: str, strict_qr: bool = False) -> tuple[Optional[
         return codigo, servico, None
 
     # NF-e (44 dígitos) — inválido
-    if re.match(r"^\d{44}$", all_digits):
+    if len(all_digits) == 44:
         return None, None, None
 
     # Shopee (BR embutido ou 12–13 dígitos)
@@ -1,16 +1,21 @@
 from __future__ import annotations
 
 import datetime
+import hashlib
 import re
+import threading
 import time
+import zlib
 from datetime import date, timedelta
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Optional, List, Literal, Dict, Tuple
+from functools import lru_cache
+from typing import Callable, Optional, List, Literal, Dict, Iterator, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel, ConfigDict, Field
-from sqlalchemy import select, func
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+from sqlalchemy import Date, event, select, func, and_, or_, bindparam, insert, text
+from sqlalchemy.orm import Session, raiseload
 
 from db import get_db
 from auth import get_current_user
@@ -106,28 +111,62 @@ class LoteResponse(BaseModel):
 # HELPERS
 # ============================================================
 
+_ZERO = Decimal("0")
+_CENT = Decimal("0.01")
+
+
 def _decimal(v) -> Decimal:
+    # Numeric chega do banco já como Decimal: devolve direto, sem str() + parse por valor.
+    # "or _ZERO" mantém o mesmo resultado do caminho genérico para zero/None.
+    if type(v) is Decimal:
+        return v or _ZERO
     try:
         return Decimal(str(v or 0))
     except Exception:
         return Decimal("0")
 
 
+def _centavos(v) -> int:
+    """Preço/valor em centavos inteiros (preços são Numeric(12, 2), então é exato)."""
+    return int(_decimal(v).quantize(_CENT) * 100)
+
+
+def _de_centavos(centavos: int) -> Decimal:
+    """Centavos inteiros -> Decimal com 2 casas, só na hora de devolver/gravar."""
+    return Decimal(centavos).scaleb(-2)
+
+
 def _fmt_money(d: Decimal) -> str:
-    return f"{d.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)}"
+    return format(d.quantize(_CENT, rounding=ROUND_HALF_UP), "f")
+
+
+_SERVICO_MAP: Dict[str, Literal["shopee", "mercado_livre", "avulso"]] = {
+    "shopee": "shopee",
+    "ml": "mercado_livre",
+    "mercado livre": "mercado_livre",
+    "mercado_livre": "mercado_livre",
+}
+_SERVICO_LABEL_SAIDA = {"shopee": "shopee", "mercado_livre": "Mercado Livre", "avulso": "avulso"}
 
 
 def _normalize_servico(raw: str) -> Literal["shopee", "mercado_livre", "avulso"]:
-    s = (raw or "").strip().lower()
-    if s == "shopee":
-        return "shopee"
-    if s in {"ml", "mercado livre", "mercado_livre"}:
-        return "mercado_livre"
-    return "avulso"
+    # Qualquer valor fora do mapa continua caindo em avulso (contrato do lote).
+    return _SERVICO_MAP.get((raw or "").strip().lower(), "avulso")
 
 
 def _servico_label_for_saida(s: Literal["shopee", "mercado_livre", "avulso"]) -> str:
-    return "Mercado Livre" if s == "mercado_livre" else s
+    return _SERVICO_LABEL_SAIDA[s]
+
+
+@lru_cache(maxsize=64)
+def _classificar_servico_saida(servico: Optional[str]) -> Literal["shopee", "mercado_livre", "avulso"]:
+    """Saida.servico gravado (Shopee, Mercado Livre, mercado_livre, ...) -> chave de contagem."""
+    serv = (servico or "").lower().replace("_", " ").strip()
+    if serv == "shopee":
+        return "shopee"
+    if serv.startswith("mercado"):
+        return "mercado_livre"
+    return "avulso"
 
 
 def _should_store_qr_payload_raw(servico: str, qr_raw: Optional[str]) -> bool:
@@ -155,38 +194,112 @@ def _sub_base_from_token_or_422(user: User) -> str:
     return sb
 
 
-def _resolve_entregador_info(db: Session, user: User) -> Tuple[str, str, str, Optional[int]]:
+def _resolve_entregador_info(
+    db: Session, user: User, base: Optional[str] = None
+) -> Tuple[str, str, str, Optional[int]]:
     """
     Objetivo: reduzir consultas.
     - Primeiro usa o que já vem do JWT (sub_base + username).
     - Opcionalmente consulta Entregador 1x para validar ativo e pegar 'nome'.
+    - Se `base` for informada, traz a BasePreco no mesmo SELECT (aquece o cache de preços).
     - Não faz fallback para tabela User (isso era custo antigo do auth).
     """
     sub_base = _sub_base_from_token_or_422(user)
     username = getattr(user, "username", None) or "Sistema"
 
+    key = (sub_base, username)
+    hit = _entregador_info_cache.get(key)
+    if hit and hit[0] > time.time():
+        _, ativo, info = hit
+        if not ativo:
+            raise HTTPException(403, "Entregador inativo.")
+        return info
+
     # Se existir Entregador, valida ativo e melhora o nome exibido
-    ent = db.scalar(
-        select(Entregador).where(Entregador.username_entregador == username)
-    )
+    ent = _fetch_entregador_com_precos(db, Entregador.username_entregador == username, base)
     if ent:
-        if hasattr(ent, "ativo") and not ent.ativo:
-            raise HTTPException(403, "Entregador inativo.")
+        ativo = not (hasattr(ent, "ativo") and not ent.ativo)
         if getattr(ent, "sub_base", None):
             sub_base = ent.sub_base  # mantém compatibilidade se a verdade estiver no Entregador
         entregador_nome = (getattr(ent, "nome", None) or ent.username_entregador)
-        return sub_base, entregador_nome, ent.username_entregador, ent.id_entregador
+        info = (sub_base, entregador_nome, ent.username_entregador, ent.id_entregador)
+    else:
+        # Sem Entregador cadastrado: usa JWT
+        ativo = True
+        info = (sub_base, username, username, None)
+
+    _guardar_em_cache(
+        _entregador_info_cache, key, (time.time() + _ENTREGADOR_CACHE_TTL_S, ativo, info), _ENTREGADOR_CACHE_MAX
+    )
+    if not ativo:
+        raise HTTPException(403, "Entregador inativo.")
+    return info
+
+
+# ============================================================
+# CACHE Entregador do usuário (TTL curto, por-processo)
+# ============================================================
+_ENTREGADOR_CACHE_TTL_S = 60.0
+_ENTREGADOR_CACHE_MAX = 1024
+_entregador_info_cache: Dict[
+    Tuple[str, str], Tuple[float, bool, Tuple[str, str, str, Optional[int]]]
+] = {}
+
 
-    # Sem Entregador cadastrado: usa JWT
-    return sub_base, username, username, None
+def invalidar_cache_entregador(sub_base: Optional[str]) -> None:
+    """
+    Chamado pelo CRUD de entregadores após commit (criação, edição, exclusão).
+    Descarta as entradas da sub_base: pela chave (sub_base do token) e pelo valor, porque
+    o Entregador é achado só pelo username e pode estar gravado sob outra sub_base do token.
+    Cobre também o PATCH que troca o username (a entrada antiga sai pela sub_base).
+    """
+    _descartar_sub_base(_entregador_info_cache, sub_base)
+    with _cache_lock:
+        for key in [k for k, v in _entregador_info_cache.items() if v[2][0] == sub_base]:
+            del _entregador_info_cache[key]
 
 
 # ============================================================
 # CACHE BasePreco (TTL curto, por-processo)
 # ============================================================
 _BASE_PRECO_CACHE_TTL_S = 120.0
+_BASE_PRECO_CACHE_MAX = 1024
 _base_preco_cache: Dict[Tuple[str, str], Tuple[float, Decimal, Decimal, Decimal]] = {}
 
+# Escritas/invalidações dos caches por-processo vêm de várias threads do threadpool:
+# varrer o dict enquanto outra thread insere levanta "dictionary changed size during iteration".
+# Leitura (dict.get) dispensa o lock.
+_cache_lock = threading.Lock()
+
+
+def _guardar_em_cache(cache: Dict, key, valor, limite: int) -> None:
+    """Grava com teto de tamanho: cheio, descarta os vencidos e, se preciso, os mais antigos."""
+    with _cache_lock:
+        if key not in cache and len(cache) >= limite:
+            agora = time.time()
+            for k in [k for k, v in cache.items() if v[0] <= agora]:
+                del cache[k]
+            while len(cache) >= limite:
+                del cache[next(iter(cache))]
+        cache[key] = valor
+
+
+def _descartar_sub_base(cache: Dict, sub_base: Optional[str]) -> None:
+    """Remove as entradas da sub_base (chaves com sub_base na 1ª posição)."""
+    with _cache_lock:
+        for key in [k for k in cache if k[0] == sub_base]:
+            del cache[key]
+
+
+def _descartar_usuario(cache: Dict, user_id: Optional[int], *identificadores: Optional[str]) -> None:
+    """Remove as entradas do usuário (chaves (id, ...) do token): pelo id ou por email/username."""
+    alvos = {i for i in identificadores if i}
+    with _cache_lock:
+        for key in [
+            k for k in cache if (user_id is not None and k[0] == user_id) or alvos.intersection(k[1:])
+        ]:
+            del cache[key]
+
 
 def _get_precos_cached(db: Session, sub_base: str, base: str) -> Tuple[Decimal, Decimal, Decimal]:
     """
@@ -209,51 +322,101 @@ def _get_precos_cached(db: Session, sub_base: str, base: str) -> Tuple[Decimal,
             f"Tabela de preços não encontrada para sub_base={sub_base!r} e base={base!r}."
         )
 
+    return _store_precos_cache(sub_base, base, precos)
+
+
+def _store_precos_cache(sub_base: str, base: str, precos: BasePreco) -> Tuple[Decimal, Decimal, Decimal]:
     p_shopee = _decimal(precos.shopee)
     p_ml = _decimal(precos.ml)
     p_avulso = _decimal(precos.avulso)
 
-    _base_preco_cache[key] = (now + _BASE_PRECO_CACHE_TTL_S, p_shopee, p_ml, p_avulso)
+    _guardar_em_cache(
+        _base_preco_cache,
+        (sub_base, base),
+        (time.time() + _BASE_PRECO_CACHE_TTL_S, p_shopee, p_ml, p_avulso),
+        _BASE_PRECO_CACHE_MAX,
+    )
     return p_shopee, p_ml, p_avulso
 
 
+def invalidar_cache_precos(sub_base: str) -> None:
+    """Chamado pelo CRUD de /base após commit: descarta os preços cacheados da sub_base."""
+    _descartar_sub_base(_base_preco_cache, sub_base)
+
+
+def _fetch_entregador_com_precos(db: Session, where_clause, base: Optional[str]) -> Optional[Entregador]:
+    """
+    Busca o Entregador e, no mesmo round-trip, a BasePreco de (ent.sub_base, base).
+    Entregador sem preço cadastrado continua sendo retornado (LEFT JOIN); o 404 de preço
+    fica para _get_precos_cached, que aqui só consulta o banco se o JOIN não trouxe a linha.
+    """
+    if base is None:
+        return db.scalar(select(Entregador).where(where_clause))
+
+    row = db.execute(
+        select(Entregador, BasePreco)
+        .outerjoin(
+            BasePreco,
+            and_(BasePreco.sub_base == Entregador.sub_base, BasePreco.base == base),
+        )
+        .where(where_clause)
+        .limit(1)
+    ).first()
+    if not row:
+        return None
+    ent, precos = row
+    if precos is not None and ent.sub_base:
+        _store_precos_cache(ent.sub_base, base, precos)
+    return ent
+
+
 # ============================================================
 # REPROCESSAMENTO DE COLETA
 # ============================================================
 
-def recalcular_coleta(db: Session, id_coleta: int):
-    coleta = db.get(Coleta, id_coleta)
+# Coleta carregada só para ler/atualizar colunas e validar ColetaOut (que não tem relações):
+# acesso a coleta.saidas levanta erro em vez de virar lazy load (N+1) silencioso.
+_COLETA_SEM_RELACOES = (raiseload("*"),)
+
+def recalcular_coleta(db: Session, id_coleta: int, sessao_externa: Optional[Session] = None):
+    """
+    Recalcula contagens e valor da coleta a partir das saídas vinculadas.
+    sessao_externa: sessão cuja transação grava de fato quando db só está ligada à conexão
+    dela (listener de Saida); a invalidação do resumo espera o commit dessa sessão.
+    """
+    coleta = db.get(Coleta, id_coleta, options=_COLETA_SEM_RELACOES)
     if not coleta:
         raise HTTPException(404, f"Coleta {id_coleta} não encontrada.")
 
-    saidas = db.scalars(select(Saida).where(Saida.id_coleta == id_coleta)).all()
-    if not saidas:
+    # Contagem por serviço no banco: poucas linhas (uma por valor distinto de servico)
+    # em vez de todas as saídas da coleta; roda a cada update de Saida (listener).
+    por_servico = db.execute(
+        select(Saida.servico, func.count())
+        .where(Saida.id_coleta == id_coleta)
+        .group_by(Saida.servico)
+    ).all()
+    if not por_servico:
         raise HTTPException(400, "Nenhuma saída vinculada à coleta.")
 
     count = {"shopee": 0, "mercado_livre": 0, "avulso": 0}
 
-    for s in saidas:
-        serv = (s.servico or "").lower().replace("_", " ").strip()
-        if serv == "shopee":
-            count["shopee"] += 1
-        elif serv.startswith("mercado"):
-            count["mercado_livre"] += 1
-        else:
-            count["avulso"] += 1
+    for servico, n in por_servico:
+        count[_classificar_servico_saida(servico)] += n
 
     p_shopee, p_ml, p_avulso = _get_precos_cached(db, coleta.sub_base, coleta.base)
 
     total = (
-        _decimal(count["shopee"]) * p_shopee +
-        _decimal(count["mercado_livre"]) * p_ml +
-        _decimal(count["avulso"]) * p_avulso
-    ).quantize(Decimal("0.01"))
+        count["shopee"] * p_shopee +
+        count["mercado_livre"] * p_ml +
+        count["avulso"] * p_avulso
+    ).quantize(_CENT)
 
     coleta.shopee = count["shopee"]
     coleta.mercado_livre = count["mercado_livre"]
     coleta.avulso = count["avulso"]
     coleta.valor_total = total
 
+    invalidar_cache_resumo_apos_commit(sessao_externa or db, coleta.sub_base)
     db.commit()
     db.refresh(coleta)
     return coleta
@@ -263,16 +426,52 @@ def recalcular_coleta(db: Session, id_coleta: int):
 # POST /coletas/lote
 # ============================================================
 
+# Códigos espalhados num número fixo de buckets por sub_base: o lote trava no máximo
+# _LOCK_BUCKETS advisory locks (a tabela de locks do Postgres é finita e cada lock fica
+# até o commit), e dois lotes com o mesmo código continuam caindo no mesmo bucket.
+_LOCK_BUCKETS = 64
+_LOCK_CODIGOS_SQL = text(
+    "SELECT pg_advisory_xact_lock(hashtext(:sub_base), b) "
+    "FROM unnest(CAST(:buckets AS int[])) WITH ORDINALITY AS t(b, n) ORDER BY n"
+)
+
+
+def _buckets_codigos(codigos: List[str]) -> List[int]:
+    """Buckets distintos e ordenados dos códigos (crc32: estável entre processos, ao contrário de hash())."""
+    return sorted({zlib.crc32(c.encode("utf-8")) % _LOCK_BUCKETS for c in codigos})
+
+
+def _lock_codigos_lote(db: Session, sub_base: str, codigos: List[str]) -> None:
+    """Advisory lock (transação) por (sub_base, bucket do código), em ordem fixa para não haver deadlock."""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    db.execute(_LOCK_CODIGOS_SQL, {"sub_base": sub_base, "buckets": _buckets_codigos(codigos)})
+
+
 @router.post("/lote", response_model=LoteResponse, status_code=201)
 def registrar_coleta_em_lote(
     payload: ColetaLoteIn,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    # 0) Normaliza itens (código + serviço) e detecta duplicados no próprio payload (zero DB):
+    #    payload inválido devolve 422/409 antes de qualquer consulta.
+    itens_norm: List[Tuple[str, Literal["shopee", "mercado_livre", "avulso"], ItemLote]] = []
+    seen = set()
+    for it in payload.itens:
+        c = (it.codigo or "").strip()
+        if not c:
+            raise HTTPException(422, "Código inválido.")
+        if c in seen:
+            raise HTTPException(409, f"Código '{c}' duplicado no lote.")
+        seen.add(c)
+        itens_norm.append((c, _normalize_servico(it.servico), it))
+    norm_codes = [c for c, _, _ in itens_norm]
+
     # 1) Resolve sub_base + entregador: prioriza payload.entregador_id, senão JWT
     sub_base = _sub_base_from_token_or_422(current_user)
     if payload.entregador_id is not None:
-        ent = db.get(Entregador, payload.entregador_id)
+        ent = _fetch_entregador_com_precos(db, Entregador.id_entregador == payload.entregador_id, payload.base)
         if not ent or ent.sub_base != sub_base:
             raise HTTPException(422, "Entregador não encontrado ou não pertence à sua base.")
         if hasattr(ent, "ativo") and not ent.ativo:
@@ -281,118 +480,129 @@ def registrar_coleta_em_lote(
         username_entregador = ent.username_entregador or ""
         entregador_id = ent.id_entregador
     else:
-        sub_base, entregador_nome, username_entregador, entregador_id = _resolve_entregador_info(db, current_user)
+        sub_base, entregador_nome, username_entregador, entregador_id = _resolve_entregador_info(
+            db, current_user, payload.base
+        )
 
     # 2) preços BasePreco para valores de entradas da coleta (valor_total e resumo)
+    #    (normalmente já aquecidos pelo JOIN acima: sem SELECT extra)
     p_shopee, p_ml, p_avulso = _get_precos_cached(db, sub_base, payload.base)
 
     # 3) valor de cobrança do admin ao owner: somente Owner.valor (nunca BasePreco como fallback)
-    owner = db.scalar(select(Owner).where(Owner.sub_base == sub_base))
-    valor_cobranca_owner = _decimal(getattr(owner, "valor", 0)) if owner else Decimal("0")
-
-    # 4) Normaliza itens e detecta duplicados no próprio payload (zero DB)
-    #    (você vai tratar duplicidade no front, mas aqui evita lixo óbvio e reduz queries)
-    norm_codes: List[str] = []
-    seen = set()
-    for it in payload.itens:
-        c = (it.codigo or "").strip()
-        if not c:
-            raise HTTPException(422, "Código inválido.")
-        if c in seen:
-            # Mantém comportamento de falhar, mas agora sem DB
-            raise HTTPException(409, f"Código '{c}' duplicado no lote.")
-        seen.add(c)
-        norm_codes.append(c)
+    #    (só a coluna: sem hidratar o Owner inteiro; sem owner -> None -> 0)
+    valor_cobranca_owner = _decimal(db.scalar(select(Owner.valor).where(Owner.sub_base == sub_base)))
 
-    # 5) Checagem de duplicidade no banco em 1 consulta (IN)
+    # 4) Checagem de duplicidade no banco em 1 consulta (IN)
     #    Mesmo com front ajustado, isso protege integridade e evita N SELECTs.
-    existing_codes = set(
-        db.scalars(
-            select(Saida.codigo).where(
-                Saida.sub_base == sub_base,
-                Saida.codigo.in_(norm_codes)
-            )
-        ).all()
+    #    (sub_base, codigo) não é UNIQUE no banco (ver migrations/README.md), então não dá
+    #    para usar ON CONFLICT; o lock por bucket de código até o commit evita que dois lotes
+    #    concorrentes com o mesmo código passem juntos pela checagem.
+    _lock_codigos_lote(db, sub_base, norm_codes)
+    # Basta um duplicado para o 409: LIMIT 1 (ordenado, para a mensagem ser determinística)
+    # em vez de trazer todos os códigos já coletados do lote.
+    dup = db.scalar(
+        select(Saida.codigo)
+        .where(Saida.sub_base == sub_base, Saida.codigo.in_(norm_codes))
+        .order_by(Saida.codigo)
+        .limit(1)
     )
-    if existing_codes:
-        # Para manter compatibilidade com o comportamento antigo (falha no primeiro),
-        # escolhemos um determinístico.
-        dup = sorted(existing_codes)[0]
+    if dup is not None:
         raise HTTPException(409, f"Código '{dup}' já coletado.")
 
-    created = 0
     count = {"shopee": 0, "mercado_livre": 0, "avulso": 0}
+    for _, serv_key, _ in itens_norm:
+        count[serv_key] += 1
+    valor_total = (
+        count["shopee"] * p_shopee +
+        count["mercado_livre"] * p_ml +
+        count["avulso"] * p_avulso
+    ).quantize(_CENT)
     saidas_criadas: List[SaidaCriadaLote] = []
 
     try:
-        coleta = Coleta(
-            sub_base=sub_base,
-            base=payload.base,
-            username_entregador=username_entregador,
-            shopee=0,
-            mercado_livre=0,
-            avulso=0,
-            valor_total=Decimal("0.00"),
-        )
-        db.add(coleta)
-        db.flush()
-
-        # 6) Inserção em loop, sem SELECTs dentro
-        for item in payload.itens:
-            serv_key = _normalize_servico(item.servico)
-            codigo = item.codigo.strip()
+        # Contagens e total já são conhecidos: a coleta entra com os valores finais num
+        # INSERT ... RETURNING (sem UPDATE posterior nem refresh após o commit).
+        id_coleta, coleta_ts = db.execute(
+            insert(Coleta).returning(Coleta.id_coleta, Coleta.timestamp),
+            [
+                {
+                    "sub_base": sub_base,
+                    "base": payload.base,
+                    "username_entregador": username_entregador,
+                    "shopee": count["shopee"],
+                    "mercado_livre": count["mercado_livre"],
+                    "avulso": count["avulso"],
+                    "valor_total": valor_total,
+                }
+            ],
+        ).one()
+
+        # 5) Saídas inseridas em lote: um único INSERT ... RETURNING (insertmanyvalues),
+        #    em vez de add + flush por item. A ordem dos ids segue a ordem de itens_norm.
+        username_operador = getattr(current_user, "username", None)
+        saida_rows = []
+        for codigo, serv_key, item in itens_norm:
+            servico_label = _servico_label_for_saida(serv_key)
             qr_raw = getattr(item, "qr_payload_raw", None)
-            store_qr = _should_store_qr_payload_raw(_servico_label_for_saida(serv_key), qr_raw)
-
-            saida = Saida(
-                sub_base=sub_base,
-                base=payload.base,
-                username=getattr(current_user, "username", None),
-                entregador=entregador_nome,
-                entregador_id=entregador_id,
-                codigo=codigo,
-                servico=_servico_label_for_saida(serv_key),
-                status="coletado",
-                id_coleta=coleta.id_coleta,
-                qr_payload_raw=qr_raw.strip() if store_qr and qr_raw else None,
-                is_grande=getattr(item, "is_grande", False),
-            )
-            db.add(saida)
-            db.flush()
-            db.add(
-                SaidaHistorico(
-                    id_saida=saida.id_saida,
-                    evento="criado_coleta",
-                    status_novo="coletado",
-                    user_id=getattr(current_user, "id", None),
-                )
+            store_qr = _should_store_qr_payload_raw(servico_label, qr_raw)
+            saida_rows.append(
+                {
+                    "sub_base": sub_base,
+                    "base": payload.base,
+                    "username": username_operador,
+                    "entregador": entregador_nome,
+                    "entregador_id": entregador_id,
+                    "codigo": codigo,
+                    "servico": servico_label,
+                    "status": "coletado",
+                    "id_coleta": id_coleta,
+                    "qr_payload_raw": qr_raw.strip() if store_qr and qr_raw else None,
+                    "is_grande": getattr(item, "is_grande", False),
+                }
             )
 
-            # Cobrança do admin ao owner: somente Owner.valor por pacote (nunca BasePreco)
-            db.add(
-                OwnerCobrancaItem(
-                    sub_base=sub_base,
-                    id_coleta=coleta.id_coleta,
-                    id_saida=saida.id_saida,
-                    valor=valor_cobranca_owner,
-                )
-            )
+        ids_saida = db.scalars(
+            insert(Saida).returning(Saida.id_saida, sort_by_parameter_order=True),
+            saida_rows,
+        ).all()
 
-            count[serv_key] += 1
-            created += 1
-            saidas_criadas.append(SaidaCriadaLote(codigo=codigo, id_saida=saida.id_saida))
+        # Histórico e cobrança: um INSERT executemany por tabela (sem objetos ORM por item;
+        # os ids dessas linhas não são usados aqui, então não precisa de RETURNING).
+        user_id_operador = getattr(current_user, "id", None)
+        db.execute(
+            insert(SaidaHistorico),
+            [
+                {
+                    "id_saida": id_saida,
+                    "evento": "criado_coleta",
+                    "status_novo": "coletado",
+                    "user_id": user_id_operador,
+                }
+                for id_saida in ids_saida
+            ],
+        )
+        # Cobrança do admin ao owner: somente Owner.valor por pacote (nunca BasePreco)
+        db.execute(
+            insert(OwnerCobrancaItem),
+            [
+                {
+                    "sub_base": sub_base,
+                    "id_coleta": id_coleta,
+                    "id_saida": id_saida,
+                    "valor": valor_cobranca_owner,
+                }
+                for id_saida in ids_saida
+            ],
+        )
 
-        coleta.shopee = count["shopee"]
-        coleta.mercado_livre = count["mercado_livre"]
-        coleta.avulso = count["avulso"]
-        coleta.valor_total = (
-            count["shopee"] * p_shopee +
-            count["mercado_livre"] * p_ml +
-            count["avulso"] * p_avulso
-        ).quantize(Decimal("0.01"))
+        saidas_criadas = [
+            SaidaCriadaLote(codigo=codigo, id_saida=id_saida)
+            for (codigo, _, _), id_saida in zip(itens_norm, ids_saida)
+        ]
+        created = len(saidas_criadas)
 
         db.commit()
-        db.refresh(coleta)
+        invalidar_cache_resumo(sub_base)
 
     except HTTPException:
         db.rollback()
@@ -401,8 +611,21 @@ def registrar_coleta_em_lote(
         db.rollback()
         raise HTTPException(500, f"Falha ao registrar lote: {e}")
 
+    # Campos todos calculados aqui; os demais (origem, pacotes_g, g_*) ficam nos defaults do schema.
+    coleta_out = ColetaOut.model_construct(
+        id_coleta=id_coleta,
+        timestamp=coleta_ts,
+        base=payload.base,
+        sub_base=sub_base,
+        username_entregador=username_entregador,
+        shopee=count["shopee"],
+        mercado_livre=count["mercado_livre"],
+        avulso=count["avulso"],
+        valor_total=valor_total,
+    )
+
     return LoteResponse(
-        coleta=ColetaOut.model_validate(coleta),
+        coleta=coleta_out,
         resumo=ResumoLote(
             inseridos=created,
             duplicados=0,
@@ -413,7 +636,7 @@ def registrar_coleta_em_lote(
                 "ml": _fmt_money(p_ml),
                 "avulso": _fmt_money(p_avulso),
             },
-            total=_fmt_money(coleta.valor_total),
+            total=_fmt_money(valor_total),
         ),
         saidas_criadas=saidas_criadas,
     )
@@ -452,13 +675,13 @@ def criar_coleta_manual(
     dt_day = datetime.datetime.combine(payload.data, datetime.time.min)
     dt_next = dt_day + timedelta(days=1)
     existente = db.scalar(
-        select(Coleta).where(
+        select(Coleta.id_coleta).where(
             Coleta.sub_base == sub_base,
             func.upper(Coleta.base) == base_norm.upper(),
             Coleta.timestamp >= dt_day,
             Coleta.timestamp < dt_next,
             Coleta.origem == "manual",
-        )
+        ).limit(1)
     )
     if existente:
         raise HTTPException(
@@ -469,10 +692,10 @@ def criar_coleta_manual(
     p_shopee, p_ml, p_avulso = _get_precos_cached(db, sub_base, base_norm)
 
     valor_total = (
-        _decimal(payload.shopee) * p_shopee
-        + _decimal(payload.mercado_livre) * p_ml
-        + _decimal(payload.avulso) * p_avulso
-    ).quantize(Decimal("0.01"))
+        payload.shopee * p_shopee
+        + payload.mercado_livre * p_ml
+        + payload.avulso * p_avulso
+    ).quantize(_CENT)
 
     username = getattr(current_user, "username", None) or "-"
     timestamp = datetime.datetime.combine(payload.data, datetime.time.min)
@@ -497,10 +720,14 @@ def criar_coleta_manual(
         g_avulso=g_avulso_val,
     )
     db.add(coleta)
+    # flush traz id_coleta via RETURNING; a resposta é montada antes do commit para não
+    # precisar do refresh (expire_on_commit expira o objeto e forçaria outro SELECT).
+    db.flush()
+    out = ColetaOut.model_validate(coleta)
     db.commit()
-    db.refresh(coleta)
+    invalidar_cache_resumo(sub_base)
 
-    return ColetaOut.model_validate(coleta)
+    return out
 
 
 # ============================================================
@@ -517,7 +744,7 @@ def atualizar_coleta_manual(
     sub_base = _sub_base_from_token_or_422(current_user)
     _require_coleta_manual_permitida(db, sub_base)
 
-    coleta = db.get(Coleta, id_coleta)
+    coleta = db.get(Coleta, id_coleta, options=_COLETA_SEM_RELACOES)
     if not coleta or coleta.sub_base != sub_base:
         raise HTTPException(404, "Coleta não encontrada.")
 
@@ -542,15 +769,17 @@ def atualizar_coleta_manual(
 
     p_shopee, p_ml, p_avulso = _get_precos_cached(db, coleta.sub_base, coleta.base)
     coleta.valor_total = (
-        _decimal(coleta.shopee) * p_shopee
-        + _decimal(coleta.mercado_livre) * p_ml
-        + _decimal(coleta.avulso) * p_avulso
-    ).quantize(Decimal("0.01"))
+        coleta.shopee * p_shopee
+        + coleta.mercado_livre * p_ml
+        + coleta.avulso * p_avulso
+    ).quantize(_CENT)
 
+    db.flush()
+    out = ColetaOut.model_validate(coleta)
     db.commit()
-    db.refresh(coleta)
+    invalidar_cache_resumo(sub_base)
 
-    return ColetaOut.model_validate(coleta)
+    return out
 
 
 # ============================================================
@@ -558,44 +787,159 @@ def atualizar_coleta_manual(
 # (REFATORADO: sub_base vem do JWT; remove 2-3 SELECTs por request)
 # ============================================================
 
+# Statement base montado uma vez no import; os filtros opcionais entram com bindparam, então
+# cada combinação de filtros gera sempre a mesma estrutura e reaproveita o cache de compilação
+# do SQLAlchemy (só os valores mudam por request).
+# Só as colunas de ColetaOut (sem hidratar ORM/identity map); a validação do lote inteiro
+# é feita de uma vez pelo TypeAdapter.
+_LIST_COLETAS_BASE = (
+    select(*(getattr(Coleta, campo) for campo in ColetaOut.model_fields))
+    .where(
+        Coleta.sub_base == bindparam("sub_base"),
+        (Coleta.shopee > 0) |
+        (Coleta.mercado_livre > 0) |
+        (Coleta.avulso > 0) |
+        (Coleta.valor_total > 0),
+    )
+    .order_by(Coleta.timestamp.desc())
+)
+_LIST_COLETAS_FILTRO_BASE = Coleta.base == bindparam("base")
+_LIST_COLETAS_FILTRO_ENTREGADOR = Coleta.username_entregador == bindparam("username_entregador")
+_LIST_COLETAS_FILTRO_INICIO = Coleta.timestamp >= bindparam("dt_start")
+# Fim exclusivo (início do dia seguinte): pega até 23:59:59.999999 e continua range no índice
+_LIST_COLETAS_FILTRO_FIM = Coleta.timestamp < bindparam("dt_end")
+_LIST_COLETAS_ADAPTER = TypeAdapter(List[ColetaOut])
+# Assinatura da lista completa (ETag do caminho sem limit, que não tem o corpo em memória):
+# muda com insert (count/max id), delete (count) e edição de contagens/valor. As somas são
+# ponderadas pelo id para que mover quantidade de uma coleta para outra também mude a
+# assinatura. base, sub_base, username_entregador, timestamp e origem não são alterados por
+# rota alguma depois do insert; edição direta no banco nesses campos só aparece quando outra
+# escrita mexer no conjunto (o Cache-Control de 5s não encurta essa janela).
+_LIST_COLETAS_ETAG_COLS = (
+    func.count(),
+    func.max(Coleta.id_coleta),
+    func.sum(Coleta.valor_total),
+    func.sum(Coleta.id_coleta * Coleta.valor_total),
+    func.sum(Coleta.id_coleta * Coleta.shopee),
+    func.sum(Coleta.id_coleta * Coleta.mercado_livre),
+    func.sum(Coleta.id_coleta * Coleta.avulso),
+    func.sum(Coleta.id_coleta * Coleta.pacotes_g),
+    func.sum(Coleta.id_coleta * (Coleta.g_shopee + 2 * Coleta.g_ml + 4 * Coleta.g_avulso)),
+)
+_LIST_COLETAS_CACHE_CONTROL = "private, max-age=5"
+
+
+def _if_none_match_confere(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match com comparação fraca (RFC 9110 §13.1.2): "*" ou qualquer ETag da lista
+    separada por vírgula com o mesmo valor, ignorando o prefixo W/.
+    """
+    if not if_none_match:
+        return False
+    alvo = etag[2:] if etag.startswith("W/") else etag
+    for candidato in if_none_match.split(","):
+        candidato = candidato.strip()
+        if candidato == "*":
+            return True
+        if (candidato[2:] if candidato.startswith("W/") else candidato) == alvo:
+            return True
+    return False
+# Lista completa (sem limit): lida do banco e serializada em blocos deste tamanho.
+_LIST_COLETAS_STREAM_BLOCO = 500
+
+
+def _stream_coletas_json(db: Session, stmt, params: Dict[str, object]) -> Iterator[bytes]:
+    """
+    Corpo JSON (array) de GET /coletas sem limit, bloco a bloco: nem todas as linhas nem o
+    JSON inteiro ficam em memória, e o cliente recebe os primeiros itens antes do fim da query.
+    O get_db já saiu quando o corpo é consumido, então a sessão é fechada aqui no fim.
+    """
+    try:
+        yield b"["
+        primeiro = True
+        result = db.execute(
+            stmt.execution_options(yield_per=_LIST_COLETAS_STREAM_BLOCO), params
+        ).mappings()
+        for bloco in result.partitions():
+            # dump_json do bloco gera "[...]"; tira os colchetes e emenda com vírgula
+            corpo = _LIST_COLETAS_ADAPTER.dump_json(_LIST_COLETAS_ADAPTER.validate_python(bloco))[1:-1]
+            if not primeiro:
+                yield b","
+            yield corpo
+            primeiro = False
+        yield b"]"
+    finally:
+        db.close()
+
+
 @router.get("/", response_model=List[ColetaOut])
 def list_coletas(
+    request: Request,
     base: Optional[str] = Query(None),
     username_entregador: Optional[str] = Query(None),
     data_inicio: Optional[datetime.date] = Query(None),
     data_fim: Optional[datetime.date] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     sub_base_user = _sub_base_from_token_or_422(current_user)
 
-    stmt = select(Coleta).where(Coleta.sub_base == sub_base_user)
+    stmt = _LIST_COLETAS_BASE
+    params: Dict[str, object] = {"sub_base": sub_base_user}
 
     if base:
-        stmt = stmt.where(Coleta.base == base.strip())
+        stmt = stmt.where(_LIST_COLETAS_FILTRO_BASE)
+        params["base"] = base.strip()
 
     if username_entregador:
-        stmt = stmt.where(Coleta.username_entregador == username_entregador.strip())
+        stmt = stmt.where(_LIST_COLETAS_FILTRO_ENTREGADOR)
+        params["username_entregador"] = username_entregador.strip()
 
     if data_inicio:
-        dt_start = datetime.datetime.combine(data_inicio, datetime.time.min)
-        stmt = stmt.where(Coleta.timestamp >= dt_start)
+        stmt = stmt.where(_LIST_COLETAS_FILTRO_INICIO)
+        params["dt_start"] = datetime.datetime.combine(data_inicio, datetime.time.min)
 
     if data_fim:
-        dt_end = datetime.datetime.combine(data_fim, datetime.time(23, 59, 59))
-        stmt = stmt.where(Coleta.timestamp <= dt_end)
-
-    stmt = stmt.where(
-        (Coleta.shopee > 0) |
-        (Coleta.mercado_livre > 0) |
-        (Coleta.avulso > 0) |
-        (Coleta.valor_total > 0)
+        stmt = stmt.where(_LIST_COLETAS_FILTRO_FIM)
+        params["dt_end"] = datetime.datetime.combine(data_fim + timedelta(days=1), datetime.time.min)
+
+    # Paginação opcional (sem limit = lista completa, como antes). LIMIT/OFFSET viram
+    # parâmetros no SQL, então o cache de compilação continua valendo.
+    if limit is None:
+        # ETag pela assinatura (1 agregado, sem trafegar linhas): polling repetido com o mesmo
+        # filtro e nada alterado recebe 304 sem SELECT da lista nem serialização.
+        assinatura = db.execute(stmt.with_only_columns(*_LIST_COLETAS_ETAG_COLS).order_by(None), params).one()
+        etag = 'W/"' + "-".join(str(v) for v in (*assinatura, offset)) + '"'
+        if _if_none_match_confere(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": _LIST_COLETAS_CACHE_CONTROL})
+        # Lista completa pode ser grande (períodos longos): vai em streaming, mesmo JSON de antes
+        return StreamingResponse(
+            _stream_coletas_json(db, stmt.offset(offset) if offset else stmt, params),
+            media_type="application/json",
+            headers={"ETag": etag, "Cache-Control": _LIST_COLETAS_CACHE_CONTROL},
+        )
+    if offset:
+        stmt = stmt.offset(offset)
+    stmt = stmt.limit(limit)
+
+    rows = db.execute(stmt, params).mappings().all()
+    # JSON gerado direto pelo pydantic-core, sem a 2ª validação pelo response_model
+    # nem o jsonable_encoder do FastAPI linha a linha (mesmo formato: Decimal como string).
+    corpo = _LIST_COLETAS_ADAPTER.dump_json(_LIST_COLETAS_ADAPTER.validate_python(rows))
+    # Página: o ETag é o hash do próprio corpo (cobre todos os campos devolvidos e não custa
+    # query extra; a página já é pequena). O 304 poupa tráfego e o parse no cliente.
+    etag = 'W/"' + hashlib.blake2b(corpo, digest_size=16).hexdigest() + '"'
+    if _if_none_match_confere(request.headers.get("if-none-match"), etag):
+        # 304 repete o Cache-Control do 200 para o cliente renovar a validade (RFC 9110 §15.4.5)
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": _LIST_COLETAS_CACHE_CONTROL})
+    return Response(
+        content=corpo,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": _LIST_COLETAS_CACHE_CONTROL},
     )
 
-    stmt = stmt.order_by(Coleta.timestamp.desc())
-    rows = db.scalars(stmt).all()
-    return rows
-
 
 # ============================================================
 # POST /coletas/recalcular/{id_coleta}
@@ -644,6 +988,59 @@ class ResumoResponse(BaseModel):
     contextoFechamento: Optional[Dict] = None  # { id_fechamento, status, base, periodo_inicio, periodo_fim } quando base+periodo definidos
 
 
+# Cache curto do resumo por sub_base + filtros: o dashboard refaz o mesmo resumo em polling.
+# Escritas de coleta (lote, manual, recálculo) e de fechamento da sub_base invalidam na hora;
+# o TTL cobre o que muda por fora (ex.: cancelamento de saída sem coleta).
+# Guarda o JSON já serializado: hit não passa nem pelo encoder.
+_RESUMO_CACHE_TTL_S = 30.0
+_RESUMO_CACHE_MAX = 512
+_RESUMO_ADAPTER = TypeAdapter(ResumoResponse)
+_resumo_cache: Dict[tuple, Tuple[float, bytes]] = {}
+
+
+# Outros caches que somam coletas (ex.: resumo contábil) se registram aqui, no import do
+# módulo deles: coletas não precisa importá-los (contabilidade_routes importa deste módulo).
+_invalidadores_resumo: List[Callable[[Optional[str]], None]] = []
+
+
+def registrar_invalidador_resumo(fn: Callable[[Optional[str]], None]) -> Callable[[Optional[str]], None]:
+    """Decorator: fn(sub_base) passa a rodar junto com invalidar_cache_resumo."""
+    _invalidadores_resumo.append(fn)
+    return fn
+
+
+def invalidar_cache_resumo(sub_base: Optional[str]) -> None:
+    """Chamado após commit de escritas que mudam o resumo: descarta os resumos da sub_base."""
+    _descartar_sub_base(_resumo_cache, sub_base)
+    for invalidar in _invalidadores_resumo:
+        invalidar(sub_base)
+
+
+# Sub_bases com resumo a invalidar no próximo commit real da sessão (session.info).
+_INFO_RESUMO_PENDENTE = "coletas_resumo_pendente"
+
+
+def invalidar_cache_resumo_apos_commit(db: Session, sub_base: Optional[str]) -> None:
+    """
+    Agenda invalidar_cache_resumo para depois do commit da sessão informada. Para escritas
+    dentro de uma transação que ainda não gravou (ex.: listener de Saida): invalidar antes
+    deixaria um resumo concorrente cachear os totais antigos até o TTL.
+    """
+    db.info.setdefault(_INFO_RESUMO_PENDENTE, set()).add(sub_base)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_resumos_pendentes(session: Session) -> None:
+    for sub_base in session.info.pop(_INFO_RESUMO_PENDENTE, ()):
+        invalidar_cache_resumo(sub_base)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_resumos_pendentes(session: Session) -> None:
+    # Nada foi gravado: os resumos cacheados continuam valendo
+    session.info.pop(_INFO_RESUMO_PENDENTE, None)
+
+
 @router.get("/resumo", response_model=ResumoResponse)
 def resumo_coletas(
     base: Optional[str] = Query(None),
@@ -657,6 +1054,11 @@ def resumo_coletas(
 ):
     sub_base_user = _sub_base_from_token_or_422(current_user)
 
+    cache_key = (sub_base_user, base, data_inicio, data_fim, fechamento_status, page, pageSize)
+    hit = _resumo_cache.get(cache_key)
+    if hit and hit[0] > time.time():
+        return Response(content=hit[1], media_type="application/json")
+
     base_norm = base.strip().lower() if base else None
 
     dt_start = None
@@ -664,130 +1066,158 @@ def resumo_coletas(
     if data_inicio:
         dt_start = datetime.datetime.combine(data_inicio, datetime.time.min)
     if data_fim:
-        dt_end = datetime.datetime.combine(data_fim, datetime.time(23, 59, 59))
+        dt_end = datetime.datetime.combine(data_fim + timedelta(days=1), datetime.time.min)
 
     # ----------------------------------------------------------
     # Filtro principal — tabela COLETAS
     # ----------------------------------------------------------
-    stmt = select(Coleta).where(Coleta.sub_base == sub_base_user)
+    filtros_coleta = [Coleta.sub_base == sub_base_user]
 
     if base_norm:
-        stmt = stmt.where(func.lower(Coleta.base) == base_norm)
+        filtros_coleta.append(func.lower(Coleta.base) == base_norm)
 
     if dt_start:
-        stmt = stmt.where(Coleta.timestamp >= dt_start)
+        filtros_coleta.append(Coleta.timestamp >= dt_start)
 
     if dt_end:
-        stmt = stmt.where(Coleta.timestamp <= dt_end)
+        filtros_coleta.append(Coleta.timestamp < dt_end)  # fim exclusivo (dia seguinte 00:00)
+
+    # Manuais: uma linha por coleta, só as colunas usadas no item
+    rows_manuais = db.execute(
+        select(
+            Coleta.id_coleta,
+            Coleta.timestamp,
+            Coleta.base,
+            Coleta.username_entregador,
+            Coleta.shopee,
+            Coleta.mercado_livre,
+            Coleta.avulso,
+            Coleta.valor_total,
+            Coleta.pacotes_g,
+        )
+        .where(*filtros_coleta, Coleta.origem == "manual")
+        .order_by(Coleta.timestamp.asc())
+    ).all()
 
-    stmt = stmt.order_by(Coleta.timestamp.asc())
-    rows = db.scalars(stmt).all()
+    # Codigo (origem vazia conta como codigo): somadas no banco por dia + base + entregador.
+    # Variações de grafia da base (strip/upper) e o conjunto de entregadores se juntam em
+    # Python sobre esses grupos; a ordem por primeira coleta mantém a ordem dos itens no dia.
+    dia_coleta = func.date(Coleta.timestamp, type_=Date)
+    primeira_coleta = func.min(Coleta.timestamp)
+    rows_codigo = db.execute(
+        select(
+            dia_coleta,
+            Coleta.base,
+            Coleta.username_entregador,
+            func.sum(Coleta.shopee),
+            func.sum(Coleta.mercado_livre),
+            func.sum(Coleta.avulso),
+            func.sum(Coleta.valor_total),
+            func.sum(Coleta.pacotes_g),
+        )
+        .where(*filtros_coleta, or_(Coleta.origem.is_(None), Coleta.origem != "manual"))
+        .group_by(dia_coleta, Coleta.base, Coleta.username_entregador)
+        .order_by(primeira_coleta.asc())
+    ).all()
 
     # ----------------------------------------------------------
-    # Buscar SAIDAS para cancelados e pacotes G
+    # SAIDAS: cancelados e pacotes G agregados no banco
+    # (1 GROUP BY dia + base em vez de trazer cada Saida; a chave final
+    #  continua normalizada em Python com strip().upper(), como antes)
     # ----------------------------------------------------------
-    base_saidas_stmt = select(Saida).where(Saida.sub_base == sub_base_user)
+    cancelado_cond = func.lower(Saida.status) == "cancelado"
+    grande_cond = Saida.is_grande.is_(True)
+    dia_saida = func.date(Saida.timestamp, type_=Date)
+    saidas_agg_stmt = (
+        select(
+            dia_saida,
+            Saida.base,
+            func.count().filter(cancelado_cond),
+            func.count().filter(grande_cond),
+        )
+        .where(Saida.sub_base == sub_base_user, cancelado_cond | grande_cond)
+        .group_by(dia_saida, Saida.base)
+    )
 
     if base_norm:
-        base_saidas_stmt = base_saidas_stmt.where(func.lower(Saida.base) == base_norm)
+        saidas_agg_stmt = saidas_agg_stmt.where(func.lower(Saida.base) == base_norm)
 
     if data_inicio:
-        base_saidas_stmt = base_saidas_stmt.where(Saida.data >= data_inicio)
+        saidas_agg_stmt = saidas_agg_stmt.where(Saida.data >= data_inicio)
 
     if data_fim:
-        base_saidas_stmt = base_saidas_stmt.where(Saida.data <= data_fim)
-
-    # Cancelados
-    cancelados_rows = db.scalars(
-        base_saidas_stmt.where(func.lower(Saida.status) == "cancelado")
-    ).all()
-
-    mapa_cancelados: Dict[str, int] = {}
-    for c in cancelados_rows:
-        dia = c.timestamp.date().isoformat()
-        baseKey = (c.base or "").strip().upper()
-        key = f"{dia}_{baseKey}"
-        mapa_cancelados[key] = mapa_cancelados.get(key, 0) + 1
-
-    # Pacotes G (Saida.is_grande == True)
-    g_rows = db.scalars(
-        base_saidas_stmt.where(Saida.is_grande.is_(True))
-    ).all()
-    mapa_g_saidas: Dict[str, int] = {}
-    for s in g_rows:
-        dia = s.timestamp.date().isoformat()
-        baseKey = (s.base or "").strip().upper()
-        key = f"{dia}_{baseKey}"
-        mapa_g_saidas[key] = mapa_g_saidas.get(key, 0) + 1
+        saidas_agg_stmt = saidas_agg_stmt.where(Saida.data <= data_fim)
+
+    # Cancelados e G (Saida.is_grande) entram direto na criação de cada item do resumo,
+    # pela mesma chave (dia, BASE) (sem passada extra sobre a lista).
+    # Só existem itens a partir de coletas: sem coletas no filtro, nem consulta Saida.
+    mapa_cancelados: Dict[Tuple[str, str], int] = {}
+    mapa_g_saidas: Dict[Tuple[str, str], int] = {}
+    tem_coletas = bool(rows_manuais or rows_codigo)
+    for dia_s, base_s, n_cancelados, n_g in (db.execute(saidas_agg_stmt) if tem_coletas else ()):
+        key = (dia_s.isoformat(), (base_s or "").strip().upper())
+        if n_cancelados:
+            mapa_cancelados[key] = mapa_cancelados.get(key, 0) + n_cancelados
+        if n_g:
+            mapa_g_saidas[key] = mapa_g_saidas.get(key, 0) + n_g
 
     # ----------------------------------------------------------
     # Coletas manuais: uma linha por coleta (não agregar)
     # Coletas codigo: agrupar por DIA + BASE
     # ----------------------------------------------------------
-    lista: List[ResumoItem] = []
-    agrupado: Dict[str, Dict] = {}
+    # Itens como dict até a paginação: os totais usam a lista filtrada inteira,
+    # mas só a página devolvida vira ResumoItem (validação pydantic).
+    lista: List[Dict] = []
+    agrupado: Dict[Tuple[str, str], Dict] = {}
 
-    for r in rows:
+    for r in rows_manuais:
         dia = r.timestamp.date().isoformat()
         baseKey = (r.base or "").strip().upper()
-        key = f"{dia}_{baseKey}"
-        origem = getattr(r, "origem", None) or "codigo"
-
-        if origem == "manual":
-            canc = mapa_cancelados.get(key, 0)
-            lista.append(
-                ResumoItem(
-                    data=dia,
-                    base=baseKey,
-                    shopee=r.shopee,
-                    mercado_livre=r.mercado_livre,
-                    avulso=r.avulso,
-                    valor_total=r.valor_total,
-                    cancelados=canc,
-                    entregadores=(r.username_entregador or "-"),
-                    pacotes_g=getattr(r, "pacotes_g", 0) or 0,
-                    id_coleta=r.id_coleta,
-                    origem="manual",
-                )
-            )
-        else:
-            if key not in agrupado:
-                agrupado[key] = {
-                    "data": dia,
-                    "base": baseKey,
-                    "shopee": 0,
-                    "mercado_livre": 0,
-                    "avulso": 0,
-                    "valor_total": Decimal("0.00"),
-                    "entregadores": set(),
-                    "pacotes_g": 0,
-                }
-            agrupado[key]["shopee"] += r.shopee
-            agrupado[key]["mercado_livre"] += r.mercado_livre
-            agrupado[key]["avulso"] += r.avulso
-            agrupado[key]["valor_total"] += r.valor_total
-            agrupado[key]["entregadores"].add(r.username_entregador or "-")
-            agrupado[key]["pacotes_g"] += getattr(r, "pacotes_g", 0) or 0
+        key = (dia, baseKey)
+        lista.append({
+            "data": dia,
+            "base": baseKey,
+            "shopee": r.shopee,
+            "mercado_livre": r.mercado_livre,
+            "avulso": r.avulso,
+            "valor_total": r.valor_total,
+            "cancelados": mapa_cancelados.get(key, 0),
+            "entregadores": (r.username_entregador or "-"),
+            "pacotes_g": (r.pacotes_g or 0) + mapa_g_saidas.get(key, 0),
+            "id_coleta": r.id_coleta,
+            "origem": "manual",
+        })
+
+    for dia_d, base_c, entregador, shopee, ml, avulso, valor, pacotes_g in rows_codigo:
+        dia = dia_d.isoformat()
+        baseKey = (base_c or "").strip().upper()
+        key = (dia, baseKey)
+        grupo = agrupado.get(key)
+        if grupo is None:
+            grupo = agrupado[key] = {
+                "data": dia,
+                "base": baseKey,
+                "shopee": 0,
+                "mercado_livre": 0,
+                "avulso": 0,
+                "valor_total": Decimal("0.00"),
+                "entregadores": set(),
+                "pacotes_g": 0,
+            }
+        grupo["shopee"] += shopee
+        grupo["mercado_livre"] += ml
+        grupo["avulso"] += avulso
+        grupo["valor_total"] += valor
+        grupo["entregadores"].add(entregador or "-")
+        grupo["pacotes_g"] += pacotes_g or 0
 
     for key, item in agrupado.items():
-        canc = mapa_cancelados.get(key, 0)
-        lista.append(
-            ResumoItem(
-                data=item["data"],
-                base=item["base"],
-                shopee=item["shopee"],
-                mercado_livre=item["mercado_livre"],
-                avulso=item["avulso"],
-                valor_total=item["valor_total"],
-                cancelados=canc,
-                entregadores=" | ".join(item["entregadores"]),
-                pacotes_g=item.get("pacotes_g", 0),
-                id_coleta=None,
-                origem=None,
-            )
-        )
+        item["cancelados"] = mapa_cancelados.get(key, 0)
+        item["entregadores"] = " | ".join(item["entregadores"])
+        item["pacotes_g"] += mapa_g_saidas.get(key, 0)
+        lista.append(item)
 
-    lista.sort(key=lambda x: x.data)
+    lista.sort(key=lambda x: x["data"])
 
     # ----------------------------------------------------------
     # Enriquecer com fechamento_status e id_fechamento
@@ -809,35 +1239,28 @@ def resumo_coletas(
                 dia = (f.periodo_inicio + timedelta(days=d)).isoformat()
                 fech_por_key[(dia, base_f)] = f
         for item in lista:
-            key = (item.data, item.base)
+            key = (item["data"], item["base"])
             fech = fech_por_key.get(key)
             if fech:
                 st = (fech.status or "GERADO").upper()
                 if st == "FECHADO":
                     st = "GERADO"
-                item.fechamento_status = st
-                item.id_fechamento = fech.id_fechamento
+                item["fechamento_status"] = st
+                item["id_fechamento"] = fech.id_fechamento
             else:
-                item.fechamento_status = "PENDENTE"
-                item.id_fechamento = None
+                item["fechamento_status"] = "PENDENTE"
+                item["id_fechamento"] = None
     else:
         for item in lista:
-            item.fechamento_status = "PENDENTE"
-            item.id_fechamento = None
-
-    # ----------------------------------------------------------
-    # Somar pacotes G vindos de SAIDAS (is_grande)
-    # ----------------------------------------------------------
-    for item in lista:
-        key_g = f"{item.data}_{item.base}"
-        item.pacotes_g += mapa_g_saidas.get(key_g, 0)
+            item["fechamento_status"] = "PENDENTE"
+            item["id_fechamento"] = None
 
     # Filtrar por fechamento_status se informado
     if flt_status:
         if flt_status == "PENDENTE":
-            lista = [i for i in lista if (i.fechamento_status or "PENDENTE") == "PENDENTE"]
+            lista = [i for i in lista if (i["fechamento_status"] or "PENDENTE") == "PENDENTE"]
         else:
-            lista = [i for i in lista if (i.fechamento_status or "").upper() == flt_status]
+            lista = [i for i in lista if (i["fechamento_status"] or "").upper() == flt_status]
 
     # contextoFechamento: quando base + periodo definidos e há um único fechamento cobrindo
     contexto = None
@@ -863,11 +1286,14 @@ def resumo_coletas(
                 "periodo_fim": fech_unico.periodo_fim.isoformat(),
             }
 
-    sumShopee = sum(i.shopee for i in lista)
-    sumMercado = sum(i.mercado_livre for i in lista)
-    sumAvulso = sum(i.avulso for i in lista)
-    sumValor = sum(i.valor_total for i in lista)
-    sumCancelados = sum(i.cancelados for i in lista)
+    # Totais da lista filtrada inteira numa passada só
+    sumShopee = sumMercado = sumAvulso = sumValor = sumCancelados = 0
+    for i in lista:
+        sumShopee += i["shopee"]
+        sumMercado += i["mercado_livre"]
+        sumAvulso += i["avulso"]
+        sumValor += i["valor_total"]
+        sumCancelados += i["cancelados"]
     sumTotalColetas = sumShopee + sumMercado + sumAvulso
 
     totalItems = len(lista)
@@ -875,9 +1301,9 @@ def resumo_coletas(
 
     start = (page - 1) * pageSize
     end = start + pageSize
-    items = lista[start:end]
+    items = [ResumoItem(**i) for i in lista[start:end]]
 
-    return ResumoResponse(
+    resposta = ResumoResponse(
         page=page,
         pageSize=pageSize,
         totalPages=totalPages,
@@ -891,3 +1317,8 @@ def resumo_coletas(
         sumTotalColetas=sumTotalColetas,
         contextoFechamento=contexto,
     )
+    # Serializado pelo pydantic-core (Decimal como string, igual ao response_model), sem a
+    # revalidação + jsonable_encoder do FastAPI sobre cada item da página.
+    corpo = _RESUMO_ADAPTER.dump_json(resposta)
+    _guardar_em_cache(_resumo_cache, cache_key, (time.time() + _RESUMO_CACHE_TTL_S, corpo), _RESUMO_CACHE_MAX)
+    return Response(content=corpo, media_type="application/json")
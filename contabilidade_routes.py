@@ -4,28 +4,42 @@ GET /contabilidade/resumo — resumo financeiro por período (receita, despesas
 """
 from __future__ import annotations
 
+import time as _time
 import unicodedata
+from bisect import bisect_right
+from collections import Counter, defaultdict
 from datetime import date, datetime, time, timedelta
 from decimal import Decimal
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
-from sqlalchemy import select, func, and_, or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Date, select, func, and_, or_, bindparam, case
 from sqlalchemy.orm import Session
 
 from db import get_db
 from auth import get_current_user
 from models import Coleta, Entregador, EntregadorFechamento, Motoboy, Saida, User
 from saida_operacional_utils import filtrar_saidas_por_periodo_operacional
-
-from entregador_routes import resolver_precos_entregador, resolver_precos_motoboy, _normalizar_servico
+from coletas import (
+    _CENT,
+    _ZERO,
+    _centavos,
+    _de_centavos,
+    _decimal,
+    _descartar_sub_base,
+    _guardar_em_cache,
+    registrar_invalidador_resumo,
+)
+
+from entregador_routes import resolver_precos_entregadores, resolver_precos_motoboy, _normalizar_servico
 
 router = APIRouter(prefix="/contabilidade", tags=["Contabilidade"])
 
 # Incluir "saiu_para_entrega" pois o app mobile grava SAIU_PARA_ENTREGA
 STATUS_SAIDAS_VALIDOS = ["saiu", "saiu pra entrega", "saiu_pra_entrega", "saiu_para_entrega", "em_rota", "entregue", "ausente", "pendente"]
 STATUS_FECHAMENTO_CONTABIL = ("GERADO", "REAJUSTADO", "FECHADO")  # FECHADO = legado
+SERVICOS_SAIDA_ML = ("mercado livre", "mercado_livre", "ml", "flex")
 
 
 def _saida_conta_para_indicador(saida: Saida, modo_entregas: str) -> bool:
@@ -41,11 +55,56 @@ def _saida_conta_para_indicador(saida: Saida, modo_entregas: str) -> bool:
     return st in STATUS_SAIDAS_VALIDOS
 
 
-def _decimal(v) -> Decimal:
-    try:
-        return Decimal(str(v or 0))
-    except Exception:
-        return Decimal("0")
+def _precos_em_centavos(precos: Dict[str, Any]) -> Tuple[int, int, int]:
+    """{shopee_valor, ml_valor, avulso_valor} -> (shopee, ml, avulso) em centavos."""
+    return (
+        _centavos(precos.get("shopee_valor", 0)),
+        _centavos(precos.get("ml_valor", 0)),
+        _centavos(precos.get("avulso_valor", 0)),
+    )
+
+
+_PRECOS_ZERO = (0, 0, 0)
+
+# Posição do preço na tupla (shopee, ml, avulso) em centavos, pelo serviço normalizado.
+_IDX_PRECO_SERVICO = {"shopee": 0, "flex": 1}
+
+
+def _montar_cobertura(rows_fech) -> Dict[tuple, Tuple[List[date], List[date]]]:
+    """
+    (("e", entregador_id) ou ("m", motoboy_id)) -> (inícios, fins) dos períodos fechados,
+    ordenados e mesclados (sobrepostos/contíguos viram um intervalo só).
+    Guarda um par de datas por fechamento em vez de uma entrada por dia coberto.
+    """
+    por_ator: Dict[tuple, List[Tuple[date, date]]] = defaultdict(list)
+    for f in rows_fech:
+        if f.periodo_inicio > f.periodo_fim:
+            continue
+        key = ("m", f.id_motoboy) if getattr(f, "id_motoboy", None) is not None else ("e", f.id_entregador)
+        por_ator[key].append((f.periodo_inicio, f.periodo_fim))
+    cobertura: Dict[tuple, Tuple[List[date], List[date]]] = {}
+    for key, intervalos in por_ator.items():
+        intervalos.sort()
+        inicios: List[date] = []
+        fins: List[date] = []
+        for ini, fim in intervalos:
+            if fins and ini <= fins[-1] + timedelta(days=1):
+                fins[-1] = max(fins[-1], fim)
+            else:
+                inicios.append(ini)
+                fins.append(fim)
+        cobertura[key] = (inicios, fins)
+    return cobertura
+
+
+def _dia_coberto(cobertura: Dict[tuple, Tuple[List[date], List[date]]], key: tuple, dia: date) -> bool:
+    """Busca binária do dia nos intervalos fechados do ator."""
+    intervalos = cobertura.get(key)
+    if not intervalos:
+        return False
+    inicios, fins = intervalos
+    i = bisect_right(inicios, dia) - 1
+    return i >= 0 and dia <= fins[i]
 
 
 def _normalizar_nome_entregador(s: str) -> str:
@@ -55,26 +114,42 @@ def _normalizar_nome_entregador(s: str) -> str:
     return "".join(c for c in s if unicodedata.category(c) != "Mn")
 
 
-def _resolve_actor_saida(db: Session, sub_base: str, saida: Saida) -> Tuple[Optional[int], Optional[int]]:
+def _resolver_atores_saidas(
+    db: Session, sub_base: str, saidas: Iterable[Any]
+) -> Dict[int, Tuple[Optional[int], Optional[int]]]:
     """
-    Retorna (entregador_id, motoboy_id) da saída. Exatamente um preenchido ou ambos None.
+    Retorna {id_saida: (entregador_id, motoboy_id)}. Exatamente um preenchido ou ambos None.
     Prioridade: motoboy_id (app mobile) -> entregador_id -> resolução por nome (saida.entregador).
+    Nomes legados são resolvidos em memória contra os entregadores da sub_base, carregados
+    uma vez só (1 SELECT no total em vez de 1 por saída).
     """
-    if getattr(saida, "motoboy_id", None) is not None:
-        return (None, saida.motoboy_id)
-    if getattr(saida, "entregador_id", None) is not None:
-        return (saida.entregador_id, None)
-    nome = (getattr(saida, "entregador", None) or "").strip()
-    if not nome:
-        return (None, None)
-    nome_busca = _normalizar_nome_entregador(nome)
-    ent = db.scalar(
-        select(Entregador).where(
-            Entregador.sub_base == sub_base,
-            func.lower(func.unaccent(Entregador.nome)) == nome_busca,
-        )
-    )
-    return (ent.id_entregador, None) if ent else (None, None)
+    saidas = list(saidas)
+    nome_legacy_norms = {
+        _normalizar_nome_entregador(s.entregador or "")
+        for s in saidas
+        if getattr(s, "motoboy_id", None) is None
+        and getattr(s, "entregador_id", None) is None
+        and (s.entregador or "").strip()
+    }
+    ent_por_nome_norm: Dict[str, int] = {}
+    if nome_legacy_norms:
+        for id_entregador, nome in db.execute(
+            select(Entregador.id_entregador, Entregador.nome).where(Entregador.sub_base == sub_base)
+        ):
+            key = _normalizar_nome_entregador(nome or "")
+            if key and key in nome_legacy_norms and key not in ent_por_nome_norm:
+                ent_por_nome_norm[key] = id_entregador
+    atores: Dict[int, Tuple[Optional[int], Optional[int]]] = {}
+    for s in saidas:
+        eid = getattr(s, "entregador_id", None)
+        mid = getattr(s, "motoboy_id", None)
+        if mid is not None:
+            atores[int(s.id_saida)] = (None, int(mid))
+        elif eid is not None:
+            atores[int(s.id_saida)] = (int(eid), None)
+        else:
+            atores[int(s.id_saida)] = (ent_por_nome_norm.get(_normalizar_nome_entregador(s.entregador or "")), None)
+    return atores
 
 
 def _get_motoboy_nome(db: Session, motoboy_id: int) -> str:
@@ -208,6 +283,119 @@ class ContabilidadeResumoResponse(BaseModel):
 
 # --------------- Lógica ---------------
 
+# Statements montados uma vez no import; sub_base e período entram com bindparam, então cada
+# request só troca os valores e reaproveita o cache de compilação do SQLAlchemy.
+_COLETAS_NO_PERIODO = and_(
+    Coleta.sub_base == bindparam("sub_base"),
+    Coleta.timestamp >= bindparam("dt_start"),
+    # Fim exclusivo (início do dia seguinte): pega até 23:59:59.999999 e mantém range no índice
+    Coleta.timestamp < bindparam("dt_end"),
+    # Mesmo predicado dos índices parciais ix_coletas_sub_base_timestamp_nonzero e
+    # ix_coletas_contabilidade_cobertura: o planner só usa o índice se casar exatamente.
+    or_(Coleta.shopee > 0, Coleta.mercado_livre > 0, Coleta.avulso > 0, Coleta.valor_total > 0),
+)
+_VOLUME_COLETA = (
+    func.coalesce(Coleta.shopee, 0) + func.coalesce(Coleta.mercado_livre, 0) + func.coalesce(Coleta.avulso, 0)
+)
+
+
+def _receita_proporcional(qtd):
+    """Soma da receita da coleta rateada pelo volume do serviço (qtd / volume total)."""
+    return func.coalesce(
+        func.sum(case((_VOLUME_COLETA > 0, Coleta.valor_total * qtd / _VOLUME_COLETA), else_=0)), 0
+    )
+
+
+# Receita, rateio por serviço e volumes somados no banco, agrupados pela base crua (poucos
+# valores distintos): um round-trip serve os totais e a rentabilidade por base. A normalização
+# do nome da base fica em Python para casar exatamente com o strip()/upper() do resto do app.
+_RESUMO_COLETAS_POR_BASE = (
+    select(
+        Coleta.base,
+        func.coalesce(func.sum(Coleta.valor_total), 0),
+        _receita_proporcional(func.coalesce(Coleta.shopee, 0)),
+        _receita_proporcional(func.coalesce(Coleta.mercado_livre, 0)),
+        _receita_proporcional(func.coalesce(Coleta.avulso, 0)),
+        func.coalesce(func.sum(Coleta.shopee), 0),
+        func.coalesce(func.sum(Coleta.mercado_livre), 0),
+        func.coalesce(func.sum(Coleta.avulso), 0),
+    )
+    .where(_COLETAS_NO_PERIODO)
+    .group_by(Coleta.base)
+)
+# Receita por dia somada no banco: volta uma linha por dia do período em vez de uma por coleta.
+# date() sem literais na expressão, então o GROUP BY casa com o SELECT também no psycopg.
+_DIA_COLETA = func.date(Coleta.timestamp, type_=Date)
+_RESUMO_COLETAS_DIARIAS = (
+    select(_DIA_COLETA, func.coalesce(func.sum(Coleta.valor_total), 0))
+    .where(_COLETAS_NO_PERIODO)
+    .group_by(_DIA_COLETA)
+)
+_RESUMO_RECEITA = select(func.coalesce(func.sum(Coleta.valor_total), 0)).where(_COLETAS_NO_PERIODO)
+
+# Só as colunas lidas no resumo (Row tem acesso por atributo, como a entidade).
+_RESUMO_SAIDAS = select(
+    Saida.id_saida,
+    Saida.timestamp,
+    Saida.status,
+    Saida.servico,
+    Saida.entregador_id,
+    Saida.motoboy_id,
+    Saida.entregador,
+).where(
+    Saida.sub_base == bindparam("sub_base"),
+    Saida.codigo.isnot(None),
+    func.lower(Saida.status).in_(STATUS_SAIDAS_VALIDOS),
+    Saida.timestamp >= bindparam("dt_start"),
+    Saida.timestamp < bindparam("dt_end"),
+)
+
+_FECHAMENTOS_NO_PERIODO = and_(
+    EntregadorFechamento.sub_base == bindparam("sub_base"),
+    # Meio-aberto como nas coletas/saídas (dia seguinte ao fim, exclusivo). Servido pelo
+    # ix_entregador_fechamentos_sub_base_periodo (migrations/contabilidade_resumo_indexes.sql).
+    EntregadorFechamento.periodo_inicio < bindparam("data_fim_excl"),
+    EntregadorFechamento.periodo_fim >= bindparam("data_inicio"),
+    func.upper(EntregadorFechamento.status).in_(STATUS_FECHAMENTO_CONTABIL),
+)
+# Nome do entregador vem no mesmo round-trip (outer join) para a distribuição de despesas.
+_RESUMO_FECHAMENTOS = (
+    select(
+        EntregadorFechamento.id_entregador,
+        EntregadorFechamento.id_motoboy,
+        EntregadorFechamento.periodo_inicio,
+        EntregadorFechamento.periodo_fim,
+        EntregadorFechamento.valor_final,
+        Entregador.id_entregador.label("ent_id"),
+        Entregador.nome.label("ent_nome"),
+    )
+    .outerjoin(Entregador, Entregador.id_entregador == EntregadorFechamento.id_entregador)
+    .where(_FECHAMENTOS_NO_PERIODO)
+)
+_RESUMO_DESPESA_FECHAMENTOS = select(
+    func.coalesce(func.sum(EntregadorFechamento.valor_final), 0)
+).where(_FECHAMENTOS_NO_PERIODO)
+# Receita e despesa do período anterior num round-trip só (duas subqueries escalares; só
+# sub_base é compartilhado entre os binds das duas).
+_RESUMO_PERIODO_ANTERIOR = select(
+    _RESUMO_RECEITA.scalar_subquery(), _RESUMO_DESPESA_FECHAMENTOS.scalar_subquery()
+)
+
+
+
+# Cache curto do resumo por sub_base + período + modo: o dashboard financeiro refaz a mesma
+# consulta em polling e cada cálculo custa várias queries. Guarda o JSON já serializado.
+_RESUMO_CACHE_TTL_S = 30.0
+_RESUMO_CACHE_MAX = 256
+_RESUMO_ADAPTER = TypeAdapter(ContabilidadeResumoResponse)
+_resumo_cache: Dict[tuple, Tuple[float, bytes]] = {}
+
+
+@registrar_invalidador_resumo
+def invalidar_cache_contabilidade(sub_base: Optional[str]) -> None:
+    """Chamado após commit de coletas e fechamentos: descarta os resumos contábeis da sub_base."""
+    _descartar_sub_base(_resumo_cache, sub_base)
+
 
 @router.get("/resumo", response_model=ContabilidadeResumoResponse)
 def get_resumo_contabilidade(
@@ -226,182 +414,160 @@ def get_resumo_contabilidade(
     sub_base = getattr(current_user, "sub_base", None)
     if not sub_base:
         raise HTTPException(403, "sub_base não encontrada no token. Faça login novamente.")
+
+    cache_key = (sub_base, data_inicio, data_fim, modo)
+    hit = _resumo_cache.get(cache_key)
+    if hit and hit[0] > _time.time():
+        return Response(content=hit[1], media_type="application/json")
+
     dt_start = datetime.combine(data_inicio, time.min)
-    dt_end = datetime.combine(data_fim, time(23, 59, 59))
+    dt_end = datetime.combine(data_fim + timedelta(days=1), time.min)
 
     # ---- 1) RECEITA (coletas no período) ----
-    stmt_coletas = (
-        select(Coleta)
-        .where(
-            Coleta.sub_base == sub_base,
-            Coleta.timestamp >= dt_start,
-            Coleta.timestamp <= dt_end,
-        )
-        .where(
-            (Coleta.shopee > 0) | (Coleta.mercado_livre > 0) | (Coleta.avulso > 0) | (Coleta.valor_total > 0)
-        )
-    )
-    rows_coletas = db.scalars(stmt_coletas).all()
-    receita_bruta = sum(_decimal(c.valor_total) for c in rows_coletas)
-    total_coletas = sum((c.shopee or 0) + (c.mercado_livre or 0) + (c.avulso or 0) for c in rows_coletas)
-
-    # Receita por serviço (proporcional pelo volume da coleta)
-    receita_shopee = Decimal("0")
-    receita_ml = Decimal("0")
-    receita_avulso = Decimal("0")
-    coletas_shopee = 0
-    coletas_ml = 0
-    coletas_avulso = 0
-    for c in rows_coletas:
-        s, m, a = (c.shopee or 0), (c.mercado_livre or 0), (c.avulso or 0)
-        tot = s + m + a
-        v = _decimal(c.valor_total)
-        if tot > 0:
-            receita_shopee += v * Decimal(s) / Decimal(tot)
-            receita_ml += v * Decimal(m) / Decimal(tot)
-            receita_avulso += v * Decimal(a) / Decimal(tot)
-        coletas_shopee += s
-        coletas_ml += m
-        coletas_avulso += a
+    params_periodo = {"sub_base": sub_base, "dt_start": dt_start, "dt_end": dt_end}
+    receita_bruta = receita_shopee = receita_ml = receita_avulso = _ZERO
+    coletas_shopee = coletas_ml = coletas_avulso = 0
+    base_receita: Dict[str, Decimal] = defaultdict(Decimal)
+    for base_raw, rec, rec_s, rec_m, rec_a, qtd_s, qtd_m, qtd_a in db.execute(
+        _RESUMO_COLETAS_POR_BASE, params_periodo
+    ):
+        rec = _decimal(rec)
+        receita_bruta += rec
+        receita_shopee += _decimal(rec_s)
+        receita_ml += _decimal(rec_m)
+        receita_avulso += _decimal(rec_a)
+        coletas_shopee += int(qtd_s or 0)
+        coletas_ml += int(qtd_m or 0)
+        coletas_avulso += int(qtd_a or 0)
+        base_receita[(base_raw or "").strip().upper() or "SEM BASE"] += rec
+    total_coletas = coletas_shopee + coletas_ml + coletas_avulso
+    ganhos_por_dia: Dict[date, Decimal] = defaultdict(Decimal)
+    for dia, valor in db.execute(_RESUMO_COLETAS_DIARIAS, params_periodo):
+        ganhos_por_dia[dia] += _decimal(valor)
 
     # ---- 2) SAÍDAS (contagem no período) ----
-    stmt_saidas = (
-        select(Saida)
-        .where(
-            Saida.sub_base == sub_base,
-            Saida.codigo.isnot(None),
-            func.lower(Saida.status).in_(STATUS_SAIDAS_VALIDOS),
-            Saida.timestamp >= dt_start,
-            Saida.timestamp <= dt_end,
-        )
-    )
-    rows_saidas_all = db.scalars(stmt_saidas).all()
+    rows_saidas_all = db.execute(_RESUMO_SAIDAS, params_periodo).all()
     rows_saidas_raw, op_ctx_map = filtrar_saidas_por_periodo_operacional(db, rows_saidas_all, data_inicio, data_fim)
     # Filtrar pelo modo de indicadores: só contam saídas que "entregaram" conforme modo (saiu vs entregue)
     rows_saidas = [s for s in rows_saidas_raw if _saida_conta_para_indicador(s, modo)]
     total_saidas = len(rows_saidas)
     # Resolve ator de cada saída uma única vez para reutilizar em todos os loops.
-    nome_legacy_norms = {
-        _normalizar_nome_entregador((s.entregador or ""))
-        for s in rows_saidas
-        if getattr(s, "motoboy_id", None) is None
-        and getattr(s, "entregador_id", None) is None
-        and (s.entregador or "").strip()
-    }
-    ent_por_nome_norm: Dict[str, int] = {}
-    if nome_legacy_norms:
-        rows_ent = db.scalars(select(Entregador).where(Entregador.sub_base == sub_base)).all()
-        for ent in rows_ent:
-            key = _normalizar_nome_entregador(ent.nome or "")
-            if key and key in nome_legacy_norms and key not in ent_por_nome_norm:
-                ent_por_nome_norm[key] = ent.id_entregador
-    actor_por_saida: Dict[int, Tuple[Optional[int], Optional[int]]] = {}
-    for s in rows_saidas:
-        eid = getattr(s, "entregador_id", None)
-        mid = getattr(s, "motoboy_id", None)
-        if mid is not None:
-            actor_por_saida[int(s.id_saida)] = (None, int(mid))
-            continue
-        if eid is not None:
-            actor_por_saida[int(s.id_saida)] = (int(eid), None)
-            continue
-        nome_norm = _normalizar_nome_entregador(s.entregador or "")
-        actor_por_saida[int(s.id_saida)] = (ent_por_nome_norm.get(nome_norm), None)
+    actor_por_saida = _resolver_atores_saidas(db, sub_base, rows_saidas)
     nomes_motoboy_map = _carregar_nomes_motoboy_ids(
         db,
         [mid for eid, mid in actor_por_saida.values() if mid is not None],
     )
 
-    # Saídas por serviço
-    saidas_shopee = sum(1 for s in rows_saidas if (s.servico or "").lower() == "shopee")
-    saidas_ml = sum(1 for s in rows_saidas if (s.servico or "").lower() in ("mercado livre", "mercado_livre", "ml", "flex"))
+    # Saídas por serviço: uma passada agrupando pelo serviço normalizado. A contagem fica em
+    # Python porque depende do período operacional e do modo, que não existem no SQL.
+    saidas_por_servico = Counter((s.servico or "").lower() for s in rows_saidas)
+    saidas_shopee = saidas_por_servico["shopee"]
+    saidas_ml = sum(saidas_por_servico[k] for k in SERVICOS_SAIDA_ML)
     saidas_avulso = total_saidas - saidas_shopee - saidas_ml
 
     # ---- 3) DESPESA CONFIRMADA (fechamentos GERADO/REAJUSTADO/FECHADO) ----
-    stmt_fech = (
-        select(EntregadorFechamento)
-        .where(
-            EntregadorFechamento.sub_base == sub_base,
-            EntregadorFechamento.periodo_inicio <= data_fim,
-            EntregadorFechamento.periodo_fim >= data_inicio,
-            func.upper(EntregadorFechamento.status).in_(STATUS_FECHAMENTO_CONTABIL),
-        )
-    )
-    rows_fech = db.scalars(stmt_fech).all()
+    rows_fech = []
+    ent_nomes: Dict[int, str] = {}
+    for f in db.execute(
+        _RESUMO_FECHAMENTOS, {"sub_base": sub_base, "data_inicio": data_inicio, "data_fim_excl": dt_end.date()}
+    ):
+        rows_fech.append(f)
+        if f.ent_id is not None:
+            ent_nomes[f.ent_id] = f.ent_nome or ""
     despesas_confirmadas = sum(_decimal(f.valor_final) for f in rows_fech)
 
-    # Cache: (("e", entregador_id) ou ("m", motoboy_id), data) -> fechamento cobre
-    cache_coberto: Dict[tuple, bool] = {}
+    # Períodos fechados por ator, consultados por busca binária (sem expandir dia a dia)
+    cobertura = _montar_cobertura(rows_fech)
+
+    # Despesa dos fechamentos rateada por dia (evolução diária), limitada ao período
+    despesas_por_dia: Dict[date, Decimal] = defaultdict(Decimal)
     for f in rows_fech:
+        num_dias = (f.periodo_fim - f.periodo_inicio).days + 1
+        if num_dias <= 0:
+            continue
+        v_por_dia = _decimal(f.valor_final) / Decimal(num_dias)
         d = f.periodo_inicio
         while d <= f.periodo_fim:
-            if getattr(f, "id_motoboy", None) is not None:
-                cache_coberto[(("m", f.id_motoboy), d)] = True
-            else:
-                cache_coberto[(("e", f.id_entregador), d)] = True
+            if data_inicio <= d <= data_fim:
+                despesas_por_dia[d] += v_por_dia
             d += timedelta(days=1)
 
     # ---- 3b) DESPESA PENDENTE (saídas não cobertas por fechamento) ----
+    # Uma passada só pelas saídas: a mesma saída pode entrar na despesa pendente (cobertura
+    # pela data operacional) e na evolução diária (cobertura pela data do registro).
     # Ator = entregador ou motoboy; cache de preços por tipo para não colidir
-    cache_precos: Dict[tuple, Dict[str, Decimal]] = {}  # ("e", eid) ou ("m", mid) -> precos
-    despesas_pendentes = Decimal("0")
-    despesa_pendente_por_ent: Dict[int, Decimal] = {}
-    despesa_pendente_por_motoboy: Dict[int, Decimal] = {}
+    # Preços de todos os entregadores do período carregados de uma vez (2 SELECTs no total).
+    # Acumuladores em centavos inteiros: Decimal só ao sair do laço.
+    # Falha ao resolver preço degrada para preço zero (o resumo sai sem a despesa pendente
+    # daquele ator) em vez de derrubar o endpoint.
+    try:
+        cache_precos: Dict[tuple, Tuple[int, int, int]] = {  # ("e", eid) ou ("m", mid) -> centavos
+            ("e", eid): _precos_em_centavos(precos)
+            for eid, precos in resolver_precos_entregadores(
+                db, {eid for eid, _ in actor_por_saida.values() if eid is not None}, sub_base
+            ).items()
+        }
+    except Exception:
+        cache_precos = {}
+    precos_motoboy: Optional[Tuple[int, int, int]] = None
+    pendentes_centavos = 0
+    pendente_por_ent_centavos: Dict[int, int] = defaultdict(int)
+    pendente_por_motoboy_centavos: Dict[int, int] = defaultdict(int)
+    pendente_por_dia_centavos: Dict[date, int] = defaultdict(int)
     for s in rows_saidas:
         eid, mid = actor_por_saida.get(int(s.id_saida), (None, None))
         if eid is None and mid is None:
             continue
+        key = ("e", eid) if eid is not None else ("m", mid)
         ctx = op_ctx_map.get(s.id_saida)
         op_ts = (ctx.operacional_ts if ctx and ctx.operacional_ts else None) or s.timestamp
-        data_saida = op_ts.date()
-        if eid is not None:
-            if cache_coberto.get((("e", eid), data_saida), False):
-                continue
-            key = ("e", eid)
-        else:
-            if cache_coberto.get((("m", mid), data_saida), False):
-                continue
-            key = ("m", mid)
+        pendente = not _dia_coberto(cobertura, key, op_ts.date())
+        data_saida = s.timestamp.date()
+        no_dia = data_inicio <= data_saida <= data_fim and not _dia_coberto(cobertura, key, data_saida)
+        if not (pendente or no_dia):
+            continue
         if key not in cache_precos:
-            try:
-                if eid is not None:
-                    cache_precos[key] = resolver_precos_entregador(db, eid, sub_base)
-                else:
-                    cache_precos[key] = resolver_precos_motoboy(db, sub_base)
-            except Exception:
-                cache_precos[key] = {"shopee_valor": Decimal("0"), "ml_valor": Decimal("0"), "avulso_valor": Decimal("0")}
-        precos = cache_precos[key]
-        tipo = _normalizar_servico(s.servico)
-        valor = Decimal("0")
-        if tipo == "shopee":
-            valor = _decimal(precos.get("shopee_valor", 0))
-        elif tipo == "flex":
-            valor = _decimal(precos.get("ml_valor", 0))
-        else:
-            valor = _decimal(precos.get("avulso_valor", 0))
-        despesas_pendentes += valor
-        if eid is not None:
-            despesa_pendente_por_ent[eid] = despesa_pendente_por_ent.get(eid, Decimal("0")) + valor
-        else:
-            despesa_pendente_por_motoboy[mid] = despesa_pendente_por_motoboy.get(mid, Decimal("0")) + valor
-
-    despesas_pendentes = _decimal(despesas_pendentes).quantize(Decimal("0.01"))
-    despesas_totais = _decimal(despesas_confirmadas + despesas_pendentes).quantize(Decimal("0.01"))
+            if eid is not None:
+                # Só acontece se o lote de preços dos entregadores falhou acima
+                cache_precos[key] = _PRECOS_ZERO
+            else:
+                # Motoboy sem motoboy_id na consulta usa sempre o preço global: resolve uma vez.
+                if precos_motoboy is None:
+                    try:
+                        precos_motoboy = _precos_em_centavos(resolver_precos_motoboy(db, sub_base))
+                    except Exception:
+                        precos_motoboy = _PRECOS_ZERO
+                cache_precos[key] = precos_motoboy
+        valor = cache_precos[key][_IDX_PRECO_SERVICO.get(_normalizar_servico(s.servico), 2)]
+        if pendente:
+            pendentes_centavos += valor
+            if eid is not None:
+                pendente_por_ent_centavos[eid] += valor
+            else:
+                pendente_por_motoboy_centavos[mid] += valor
+        if no_dia:
+            pendente_por_dia_centavos[data_saida] += valor
+    despesas_pendentes = _de_centavos(pendentes_centavos)
+    despesa_pendente_por_ent = {k: _de_centavos(v) for k, v in pendente_por_ent_centavos.items()}
+    despesa_pendente_por_motoboy = {k: _de_centavos(v) for k, v in pendente_por_motoboy_centavos.items()}
+    for d, v in pendente_por_dia_centavos.items():
+        despesas_por_dia[d] += _de_centavos(v)
+
+    despesas_pendentes = _decimal(despesas_pendentes).quantize(_CENT)
+    despesas_totais = _decimal(despesas_confirmadas + despesas_pendentes).quantize(_CENT)
 
     # Despesa por entregador e por motoboy (confirmada + pendente)
-    despesa_por_ent: Dict[int, Decimal] = {}
-    despesa_por_motoboy: Dict[int, Decimal] = {}
+    despesa_por_ent: Dict[int, Decimal] = defaultdict(Decimal)
+    despesa_por_motoboy: Dict[int, Decimal] = defaultdict(Decimal)
     for f in rows_fech:
-        if getattr(f, "id_motoboy", None) is not None:
-            mid = f.id_motoboy
-            despesa_por_motoboy[mid] = despesa_por_motoboy.get(mid, Decimal("0")) + _decimal(f.valor_final)
+        if f.id_motoboy is not None:
+            despesa_por_motoboy[f.id_motoboy] += _decimal(f.valor_final)
         else:
-            eid = f.id_entregador
-            despesa_por_ent[eid] = despesa_por_ent.get(eid, Decimal("0")) + _decimal(f.valor_final)
+            despesa_por_ent[f.id_entregador] += _decimal(f.valor_final)
     for eid, val in despesa_pendente_por_ent.items():
-        despesa_por_ent[eid] = despesa_por_ent.get(eid, Decimal("0")) + _decimal(val)
+        despesa_por_ent[eid] += val
     for mid, val in despesa_pendente_por_motoboy.items():
-        despesa_por_motoboy[mid] = despesa_por_motoboy.get(mid, Decimal("0")) + _decimal(val)
+        despesa_por_motoboy[mid] += val
 
     # Despesa por serviço: rateio proporcional às saídas
     if total_saidas > 0:
@@ -427,10 +593,10 @@ def get_resumo_contabilidade(
     indicadores = IndicadoresOperacionais(
         total_coletas=total_coletas,
         total_saidas=total_saidas,
-        ticket_medio_coleta=_decimal(ticket_medio).quantize(Decimal("0.01")),
-        custo_medio_saida=_decimal(custo_medio).quantize(Decimal("0.01")),
-        lucro_por_pacote=_decimal(lucro_pacote).quantize(Decimal("0.01")),
-        taxa_conversao=_decimal(taxa_conv).quantize(Decimal("0.01")),
+        ticket_medio_coleta=_decimal(ticket_medio).quantize(_CENT),
+        custo_medio_saida=_decimal(custo_medio).quantize(_CENT),
+        lucro_por_pacote=_decimal(lucro_pacote).quantize(_CENT),
+        taxa_conversao=_decimal(taxa_conv).quantize(_CENT),
     )
 
     # ---- 6) Análise por serviço ----
@@ -438,43 +604,39 @@ def get_resumo_contabilidade(
         r = _decimal(rec)
         if r == 0:
             return Decimal("0")
-        return (_decimal(r - desp) / r * Decimal("100")).quantize(Decimal("0.01"))
+        return (_decimal(r - desp) / r * Decimal("100")).quantize(_CENT)
 
     analise_servico = [
         ServicoItem(
             servico="shopee",
             coletas=coletas_shopee,
             saidas=saidas_shopee,
-            receita=_decimal(receita_shopee).quantize(Decimal("0.01")),
-            despesa=_decimal(despesa_shopee).quantize(Decimal("0.01")),
-            lucro=_decimal(receita_shopee - despesa_shopee).quantize(Decimal("0.01")),
+            receita=_decimal(receita_shopee).quantize(_CENT),
+            despesa=_decimal(despesa_shopee).quantize(_CENT),
+            lucro=_decimal(receita_shopee - despesa_shopee).quantize(_CENT),
             margem=_margem(receita_shopee, despesa_shopee),
         ),
         ServicoItem(
             servico="mercado_livre",
             coletas=coletas_ml,
             saidas=saidas_ml,
-            receita=_decimal(receita_ml).quantize(Decimal("0.01")),
-            despesa=_decimal(despesa_ml).quantize(Decimal("0.01")),
-            lucro=_decimal(receita_ml - despesa_ml).quantize(Decimal("0.01")),
+            receita=_decimal(receita_ml).quantize(_CENT),
+            despesa=_decimal(despesa_ml).quantize(_CENT),
+            lucro=_decimal(receita_ml - despesa_ml).quantize(_CENT),
             margem=_margem(receita_ml, despesa_ml),
         ),
         ServicoItem(
             servico="avulso",
             coletas=coletas_avulso,
             saidas=saidas_avulso,
-            receita=_decimal(receita_avulso).quantize(Decimal("0.01")),
-            despesa=_decimal(despesa_avulso).quantize(Decimal("0.01")),
-            lucro=_decimal(receita_avulso - despesa_avulso).quantize(Decimal("0.01")),
+            receita=_decimal(receita_avulso).quantize(_CENT),
+            despesa=_decimal(despesa_avulso).quantize(_CENT),
+            lucro=_decimal(receita_avulso - despesa_avulso).quantize(_CENT),
             margem=_margem(receita_avulso, despesa_avulso),
         ),
     ]
 
     # ---- 7) Rentabilidade por base (receita por base; despesa rateada) ----
-    base_receita: Dict[str, Decimal] = {}
-    for c in rows_coletas:
-        b = (c.base or "").strip().upper() or "SEM BASE"
-        base_receita[b] = base_receita.get(b, Decimal("0")) + _decimal(c.valor_total)
     if _decimal(receita_bruta) > 0:
         rentabilidade = []
         rec_bruta_r = _decimal(receita_bruta)
@@ -482,8 +644,8 @@ def get_resumo_contabilidade(
         for base_nome, rec in sorted(base_receita.items(), key=lambda x: -x[1]):
             rec_d = _decimal(rec)
             pct = rec_d / rec_bruta_r
-            desp_base = _decimal(desp_tot * pct).quantize(Decimal("0.01"))
-            lucro_base = _decimal(rec_d - desp_base).quantize(Decimal("0.01"))
+            desp_base = _decimal(desp_tot * pct).quantize(_CENT)
+            lucro_base = _decimal(rec_d - desp_base).quantize(_CENT)
             margem_base = _margem(rec_d, desp_base)
             rentabilidade.append(
                 BaseItem(base=base_nome, receita=rec_d, despesa=desp_base, lucro=lucro_base, margem=margem_base)
@@ -493,99 +655,46 @@ def get_resumo_contabilidade(
         rentabilidade = [BaseItem(base=b, receita=_decimal(r), despesa=Decimal("0"), lucro=_decimal(r), margem=Decimal("0")) for b, r in sorted(base_receita.items())]
 
     # ---- 8) Distribuição de despesas por entregador e motoboy ----
-    ent_ids = list(despesa_por_ent.keys())
-    ent_nomes: Dict[int, str] = {}
-    if ent_ids:
-        for e in db.scalars(select(Entregador).where(Entregador.id_entregador.in_(ent_ids))).all():
-            ent_nomes[e.id_entregador] = e.nome or ""
-    saidas_por_ent: Dict[int, int] = {}
-    saidas_por_motoboy: Dict[int, int] = {}
-    for s in rows_saidas:
-        eid, mid = actor_por_saida.get(int(s.id_saida), (None, None))
-        if eid is not None:
-            saidas_por_ent[eid] = saidas_por_ent.get(eid, 0) + 1
-        elif mid is not None:
-            saidas_por_motoboy[mid] = saidas_por_motoboy.get(mid, 0) + 1
+    # Só entregadores com despesa pendente e sem fechamento no período ainda precisam do nome.
+    ent_ids_sem_nome = [eid for eid in despesa_por_ent if eid not in ent_nomes]
+    if ent_ids_sem_nome:
+        for eid, nome in db.execute(
+            select(Entregador.id_entregador, Entregador.nome).where(Entregador.id_entregador.in_(ent_ids_sem_nome))
+        ):
+            ent_nomes[eid] = nome or ""
+    # Contagem por ator: (entregador_id, None) ou (None, motoboy_id), como em actor_por_saida
+    saidas_por_ator = Counter(actor_por_saida.values())
     dist_despesas = []
     desp_tot_dist = _decimal(despesas_totais)
     for eid, desp in despesa_por_ent.items():
         desp_d = _decimal(desp)
-        pct = (_decimal(desp_d) / desp_tot_dist * Decimal("100")).quantize(Decimal("0.01")) if desp_tot_dist else Decimal("0")
+        pct = (_decimal(desp_d) / desp_tot_dist * Decimal("100")).quantize(_CENT) if desp_tot_dist else Decimal("0")
         dist_despesas.append(
             EntregadorDespesaItem(
                 id_entregador=eid,
                 id_motoboy=None,
                 nome=ent_nomes.get(eid, "—"),
-                saidas=saidas_por_ent.get(eid, 0),
-                despesa=_decimal(desp_d).quantize(Decimal("0.01")),
+                saidas=saidas_por_ator[(eid, None)],
+                despesa=_decimal(desp_d).quantize(_CENT),
                 percentual=pct,
             )
         )
     for mid, desp in despesa_por_motoboy.items():
         desp_d = _decimal(desp)
-        pct = (_decimal(desp_d) / desp_tot_dist * Decimal("100")).quantize(Decimal("0.01")) if desp_tot_dist else Decimal("0")
+        pct = (_decimal(desp_d) / desp_tot_dist * Decimal("100")).quantize(_CENT) if desp_tot_dist else Decimal("0")
         dist_despesas.append(
             EntregadorDespesaItem(
                 id_entregador=None,
                 id_motoboy=mid,
                 nome=nomes_motoboy_map.get(mid, f"Motoboy {mid}"),
-                saidas=saidas_por_motoboy.get(mid, 0),
-                despesa=_decimal(desp_d).quantize(Decimal("0.01")),
+                saidas=saidas_por_ator[(None, mid)],
+                despesa=_decimal(desp_d).quantize(_CENT),
                 percentual=pct,
             )
         )
     dist_despesas.sort(key=lambda x: -x.despesa)
 
     # ---- 8b) Evolução diária (ganhos, despesas, lucro por dia) ----
-    ganhos_por_dia: Dict[date, Decimal] = {}
-    for c in rows_coletas:
-        d = c.timestamp.date() if hasattr(c.timestamp, "date") else c.data
-        ganhos_por_dia[d] = ganhos_por_dia.get(d, Decimal("0")) + _decimal(c.valor_total)
-
-    despesas_por_dia: Dict[date, Decimal] = {}
-    for f in rows_fech:
-        num_dias = (f.periodo_fim - f.periodo_inicio).days + 1
-        if num_dias <= 0:
-            continue
-        v_por_dia = _decimal(f.valor_final) / Decimal(num_dias)
-        d = f.periodo_inicio
-        while d <= f.periodo_fim:
-            if data_inicio <= d <= data_fim:
-                despesas_por_dia[d] = despesas_por_dia.get(d, Decimal("0")) + v_por_dia
-            d += timedelta(days=1)
-    for s in rows_saidas:
-        data_saida = s.timestamp.date()
-        eid, mid = actor_por_saida.get(int(s.id_saida), (None, None))
-        if eid is None and mid is None:
-            continue
-        if eid is not None:
-            if cache_coberto.get((("e", eid), data_saida), False):
-                continue
-            key = ("e", eid)
-        else:
-            if cache_coberto.get((("m", mid), data_saida), False):
-                continue
-            key = ("m", mid)
-        if key not in cache_precos:
-            try:
-                if eid is not None:
-                    cache_precos[key] = resolver_precos_entregador(db, eid, sub_base)
-                else:
-                    cache_precos[key] = resolver_precos_motoboy(db, sub_base)
-            except Exception:
-                cache_precos[key] = {"shopee_valor": Decimal("0"), "ml_valor": Decimal("0"), "avulso_valor": Decimal("0")}
-        precos = cache_precos[key]
-        tipo = _normalizar_servico(s.servico)
-        valor = Decimal("0")
-        if tipo == "shopee":
-            valor = _decimal(precos.get("shopee_valor", 0))
-        elif tipo == "flex":
-            valor = _decimal(precos.get("ml_valor", 0))
-        else:
-            valor = _decimal(precos.get("avulso_valor", 0))
-        if data_inicio <= data_saida <= data_fim:
-            despesas_por_dia[data_saida] = despesas_por_dia.get(data_saida, Decimal("0")) + valor
-
     evolucao_diaria = []
     d = data_inicio
     while d <= data_fim:
@@ -595,9 +704,9 @@ def get_resumo_contabilidade(
         evolucao_diaria.append(
             EvolucaoDiariaItem(
                 date=d.isoformat(),
-                ganhos=_decimal(ganhos).quantize(Decimal("0.01")),
-                despesas=_decimal(despesas).quantize(Decimal("0.01")),
-                lucro=_decimal(lucro).quantize(Decimal("0.01")),
+                ganhos=_decimal(ganhos).quantize(_CENT),
+                despesas=_decimal(despesas).quantize(_CENT),
+                lucro=_decimal(lucro).quantize(_CENT),
             )
         )
         d += timedelta(days=1)
@@ -606,22 +715,22 @@ def get_resumo_contabilidade(
     dre = [
         DRELinha(
             label="RECEITA BRUTA",
-            valor=_decimal(receita_bruta).quantize(Decimal("0.01")),
+            valor=_decimal(receita_bruta).quantize(_CENT),
             detalhes=[
-                f"Shopee ({coletas_shopee} × ticket) = {_decimal(receita_shopee).quantize(Decimal('0.01'))}",
-                f"Mercado Livre ({coletas_ml} × ticket) = {_decimal(receita_ml).quantize(Decimal('0.01'))}",
-                f"Avulso ({coletas_avulso} × ticket) = {_decimal(receita_avulso).quantize(Decimal('0.01'))}",
+                f"Shopee ({coletas_shopee} × ticket) = {_decimal(receita_shopee).quantize(_CENT)}",
+                f"Mercado Livre ({coletas_ml} × ticket) = {_decimal(receita_ml).quantize(_CENT)}",
+                f"Avulso ({coletas_avulso} × ticket) = {_decimal(receita_avulso).quantize(_CENT)}",
             ],
         ),
         DRELinha(
             label="(-) DESPESAS OPERACIONAIS",
-            valor=_decimal(despesas_totais).quantize(Decimal("0.01")),
-            detalhes=[f"Custo de Entregas ({total_saidas} × {_decimal(custo_medio).quantize(Decimal('0.01'))}) = {_decimal(despesas_totais).quantize(Decimal('0.01'))}"],
+            valor=_decimal(despesas_totais).quantize(_CENT),
+            detalhes=[f"Custo de Entregas ({total_saidas} × {_decimal(custo_medio).quantize(_CENT)}) = {_decimal(despesas_totais).quantize(_CENT)}"],
         ),
         DRELinha(
             label="LUCRO LÍQUIDO",
-            valor=_decimal(lucro_liquido).quantize(Decimal("0.01")),
-            detalhes=[f"Margem: {_decimal(margem_liquida).quantize(Decimal('0.01'))}%"],
+            valor=_decimal(lucro_liquido).quantize(_CENT),
+            detalhes=[f"Margem: {_decimal(margem_liquida).quantize(_CENT)}%"],
         ),
     ]
 
@@ -633,26 +742,17 @@ def get_resumo_contabilidade(
         prev_ini = prev_fim - timedelta(days=delta_dias - 1)
         if prev_ini >= date(2000, 1, 1):
             dt_prev_start = datetime.combine(prev_ini, time.min)
-            dt_prev_end = datetime.combine(prev_fim, time(23, 59, 59))
-            rows_c_prev = db.scalars(
-                select(Coleta).where(
-                    Coleta.sub_base == sub_base,
-                    Coleta.timestamp >= dt_prev_start,
-                    Coleta.timestamp <= dt_prev_end,
-                ).where(
-                    (Coleta.shopee > 0) | (Coleta.mercado_livre > 0) | (Coleta.avulso > 0) | (Coleta.valor_total > 0)
-                )
-            ).all()
-            rows_f_prev = db.scalars(
-                select(EntregadorFechamento).where(
-                    EntregadorFechamento.sub_base == sub_base,
-                    EntregadorFechamento.periodo_inicio <= prev_fim,
-                    EntregadorFechamento.periodo_fim >= prev_ini,
-                    func.upper(EntregadorFechamento.status).in_(STATUS_FECHAMENTO_CONTABIL),
-                )
-            ).all()
-            rec_ant = sum(_decimal(c.valor_total) for c in rows_c_prev)
-            desp_ant = sum(_decimal(f.valor_final) for f in rows_f_prev)
+            dt_prev_end = datetime.combine(prev_fim + timedelta(days=1), time.min)
+            rec_ant, desp_ant = db.execute(
+                _RESUMO_PERIODO_ANTERIOR,
+                {
+                    "sub_base": sub_base,
+                    "dt_start": dt_prev_start,
+                    "dt_end": dt_prev_end,
+                    "data_inicio": prev_ini,
+                    "data_fim_excl": dt_prev_end.date(),
+                },
+            ).one()
             rec_ant_d = _decimal(rec_ant)
             desp_ant_d = _decimal(desp_ant)
             lucro_ant = _decimal(rec_ant_d - desp_ant_d)
@@ -662,14 +762,14 @@ def get_resumo_contabilidade(
             v_lucro = (_decimal(lucro_liquido) - lucro_ant) / lucro_ant * Decimal("100") if lucro_ant else None
             v_margem = _decimal(margem_liquida) - margem_ant if margem_ant is not None else None
             comparacao = ComparacaoPeriodoAnterior(
-                receita_anterior=_decimal(rec_ant).quantize(Decimal("0.01")),
-                despesa_anterior=_decimal(desp_ant).quantize(Decimal("0.01")),
-                lucro_anterior=_decimal(lucro_ant).quantize(Decimal("0.01")),
-                margem_anterior=_decimal(margem_ant).quantize(Decimal("0.01")),
-                variacao_receita_pct=_decimal(v_rec).quantize(Decimal("0.01")) if v_rec is not None else None,
-                variacao_despesa_pct=_decimal(v_desp).quantize(Decimal("0.01")) if v_desp is not None else None,
-                variacao_lucro_pct=_decimal(v_lucro).quantize(Decimal("0.01")) if v_lucro is not None else None,
-                variacao_margem_pp=_decimal(v_margem).quantize(Decimal("0.01")) if v_margem is not None else None,
+                receita_anterior=_decimal(rec_ant).quantize(_CENT),
+                despesa_anterior=_decimal(desp_ant).quantize(_CENT),
+                lucro_anterior=_decimal(lucro_ant).quantize(_CENT),
+                margem_anterior=_decimal(margem_ant).quantize(_CENT),
+                variacao_receita_pct=_decimal(v_rec).quantize(_CENT) if v_rec is not None else None,
+                variacao_despesa_pct=_decimal(v_desp).quantize(_CENT) if v_desp is not None else None,
+                variacao_lucro_pct=_decimal(v_lucro).quantize(_CENT) if v_lucro is not None else None,
+                variacao_margem_pp=_decimal(v_margem).quantize(_CENT) if v_margem is not None else None,
             )
     except Exception:
         comparacao = None
@@ -677,15 +777,15 @@ def get_resumo_contabilidade(
     # ---- 11) Avisos ----
     aviso_pendentes = total_saidas > 0 and len(rows_fech) == 0
 
-    return ContabilidadeResumoResponse(
+    resposta = ContabilidadeResumoResponse(
         data_inicio=data_inicio.isoformat(),
         data_fim=data_fim.isoformat(),
-        receita_bruta=_decimal(receita_bruta).quantize(Decimal("0.01")),
-        despesas_confirmadas=_decimal(despesas_confirmadas).quantize(Decimal("0.01")),
-        despesas_pendentes=_decimal(despesas_pendentes).quantize(Decimal("0.01")),
-        despesas_totais=_decimal(despesas_totais).quantize(Decimal("0.01")),
-        lucro_liquido=_decimal(lucro_liquido).quantize(Decimal("0.01")),
-        margem_liquida=_decimal(margem_liquida).quantize(Decimal("0.01")),
+        receita_bruta=_decimal(receita_bruta).quantize(_CENT),
+        despesas_confirmadas=_decimal(despesas_confirmadas).quantize(_CENT),
+        despesas_pendentes=_decimal(despesas_pendentes).quantize(_CENT),
+        despesas_totais=_decimal(despesas_totais).quantize(_CENT),
+        lucro_liquido=_decimal(lucro_liquido).quantize(_CENT),
+        margem_liquida=_decimal(margem_liquida).quantize(_CENT),
         indicadores=indicadores,
         analise_por_servico=analise_servico,
         rentabilidade_por_base=rentabilidade,
@@ -697,3 +797,6 @@ def get_resumo_contabilidade(
         aviso_pendentes=aviso_pendentes,
         total_fechamentos_no_periodo=len(rows_fech),
     )
+    corpo = _RESUMO_ADAPTER.dump_json(resposta)
+    _guardar_em_cache(_resumo_cache, cache_key, (_time.time() + _RESUMO_CACHE_TTL_S, corpo), _RESUMO_CACHE_MAX)
+    return Response(content=corpo, media_type="application/json")
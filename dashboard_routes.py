@@ -19,7 +19,7 @@ from auth import get_current_user
 from base import _resolve_user_sub_base
 from models import BasePreco, Coleta, Entregador, Motoboy, Owner, OwnerCobrancaItem, Saida, User
 
-from contabilidade_routes import _get_motoboy_nome as _contab_motoboy_nome, _resolve_actor_saida
+from contabilidade_routes import _get_motoboy_nome as _contab_motoboy_nome, _resolver_atores_saidas
 from entregador_routes import resolver_precos_entregador, resolver_precos_motoboy, _normalizar_servico
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
@@ -1023,9 +1023,7 @@ def get_dashboard_saidas(
     rows_validas = [s for s in rows_saidas if _saida_conta_para_indicador(s, modo)]
     cancelamentos = sum(1 for s in rows_saidas if (s.status or "").lower() in ("cancelado", "cancelada"))
     total_saidas = len(rows_validas)
-    actor_por_saida: Dict[int, tuple] = {}
-    for s in rows_validas:
-        actor_por_saida[int(s.id_saida)] = _resolve_actor_saida(db, sub_base, s)
+    actor_por_saida = _resolver_atores_saidas(db, sub_base, rows_validas)
     taxa_cancelamento = round((cancelamentos / (total_saidas + cancelamentos) * 100), 1) if (total_saidas + cancelamentos) > 0 else 0.0
 
     # Entregadores/motoboys ativos no período (que tiveram ao menos uma saída)
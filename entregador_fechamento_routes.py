@@ -22,6 +22,7 @@ from auth import get_current_user
 from models import Entregador, EntregadorFechamento, EntregadorPreco, EntregadorPrecoGlobal, Motoboy, MotoboySubBase, Saida, User
 from saida_operacional_utils import filtrar_saidas_por_periodo_operacional
 from fechamento_pdf_service import build_fechamento_code, get_fechamento_pdf_bytes
+from contabilidade_routes import invalidar_cache_contabilidade
 
 from entregador_routes import (
     _resolve_user_base,
@@ -376,6 +377,7 @@ def criar_fechamento(
     db.add(fech)
     db.commit()
     db.refresh(fech)
+    invalidar_cache_contabilidade(sub_base)
 
     fech_id = int(fech.id_fechamento)
     try:
@@ -561,6 +563,7 @@ def atualizar_fechamento(
 
     db.commit()
     db.refresh(fech)
+    invalidar_cache_contabilidade(sub_base)
 
     fech_id = int(fech.id_fechamento)
     try:
@@ -1,16 +1,18 @@
 from __future__ import annotations
+import time
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel, ConfigDict, Field, AliasChoices
-from sqlalchemy import func, or_, select
+from sqlalchemy import case, func, or_, select
 from sqlalchemy.orm import Session, joinedload
 
 from db import get_db
 from name_normalizer import normalize_person_name
 from auth import get_current_user, get_password_hash, DEFAULT_PASSWORD
+from coletas import _descartar_usuario, _guardar_em_cache, invalidar_cache_entregador
 from models import Entregador, EntregadorFechamento, EntregadorPreco, EntregadorPrecoGlobal, Motoboy, MotoboySubBase, Saida, User
 from saida_operacional_utils import filtrar_saidas_por_periodo_operacional
 
@@ -182,19 +184,60 @@ class PrecoEntregadorUpdate(BaseModel):
 # =========================================================
 # HELPERS
 # =========================================================
+# Cache curto por processo evita o SELECT repetido em cada request do mesmo usuário (token
+# de motoboy ou sem o claim sub_base). Edição/exclusão de usuário invalida a entrada.
+_USER_BASE_CACHE_TTL_S = 300.0
+_USER_BASE_CACHE_MAX = 1024
+_user_base_cache: Dict[tuple, tuple] = {}
+
+
+def invalidar_cache_user_base(user_id: Optional[int], *identificadores: Optional[str]) -> None:
+    """Chamado pelas rotas de usuário após commit (edição/exclusão): descarta a sub_base cacheada."""
+    _descartar_usuario(_user_base_cache, user_id, *identificadores)
+
+
+def _is_token_motoboy(current_user) -> bool:
+    try:
+        return int(getattr(current_user, "role", None)) == 4
+    except (TypeError, ValueError):
+        return False
+
+
 def _resolve_user_base(db: Session, current_user) -> str:
-    """Resolve a sub_base do usuário autenticado"""
-    user_id = getattr(current_user, "id", None)
-    if user_id is not None:
-        u = db.get(User, user_id)
-        if u and getattr(u, "sub_base", None):
-            return u.sub_base
+    """
+    Resolve a sub_base do usuário autenticado.
+    O login já grava sub_base no JWT (auth._user_from_claims): leitura direta, sem SELECT.
+    Exceção: no token de motoboy (role 4) o claim é a sub_base escolhida no select-subbase,
+    não users.sub_base; para ele (e para token antigo sem o claim) vale o SELECT só da
+    coluna (id antes de username), com cache.
+    """
+    sub_base_token = getattr(current_user, "sub_base", None)
+    if sub_base_token and not _is_token_motoboy(current_user):
+        return sub_base_token
 
+    user_id = getattr(current_user, "id", None)
     uname = getattr(current_user, "username", None)
-    if uname:
-        u = db.scalars(select(User).where(User.username == uname)).first()
-        if u and getattr(u, "sub_base", None):
-            return u.sub_base
+    key = (user_id, uname)
+    hit = _user_base_cache.get(key)
+    if hit and hit[0] > time.time():
+        return hit[1]
+
+    conds = [c for c in (
+        User.id == user_id if user_id is not None else None,
+        User.username == uname if uname else None,
+    ) if c is not None]
+    if conds:
+        sub_base = db.scalar(
+            select(User.sub_base)
+            .where(or_(*conds), User.sub_base.isnot(None), User.sub_base != "")
+            .order_by(case((conds[0], 0), else_=1))
+            .limit(1)
+        )
+        if sub_base:
+            _guardar_em_cache(
+                _user_base_cache, key, (time.time() + _USER_BASE_CACHE_TTL_S, sub_base), _USER_BASE_CACHE_MAX
+            )
+            return sub_base
 
     raise HTTPException(status_code=400, detail="sub_base não definida para o usuário em 'users'.")
 
@@ -236,8 +279,6 @@ def resolver_precos_entregador(
     3. Caso contrário:
        usar EntregadorPrecoGlobal da sub_base
     """
-    zero = Decimal("0.00")
-
     preco = db.scalars(
         select(EntregadorPreco).where(EntregadorPreco.id_entregador == id_entregador)
     ).first()
@@ -246,6 +287,39 @@ def resolver_precos_entregador(
         select(EntregadorPrecoGlobal).where(EntregadorPrecoGlobal.sub_base == sub_base)
     ).first()
 
+    return _precos_com_global(preco, global_row)
+
+
+def resolver_precos_entregadores(
+    db: Session,
+    ids_entregador: Iterable[int],
+    sub_base: str,
+) -> Dict[int, Dict[str, Decimal]]:
+    """
+    Versão em lote de resolver_precos_entregador: {id_entregador: precos} com a mesma regra,
+    em 2 SELECTs no total (preços dos entregadores via IN + global da sub_base).
+    """
+    ids = {int(i) for i in ids_entregador}
+    if not ids:
+        return {}
+
+    precos_por_id = {
+        p.id_entregador: p
+        for p in db.scalars(select(EntregadorPreco).where(EntregadorPreco.id_entregador.in_(ids)))
+    }
+    global_row = db.scalars(
+        select(EntregadorPrecoGlobal).where(EntregadorPrecoGlobal.sub_base == sub_base)
+    ).first()
+
+    return {i: _precos_com_global(precos_por_id.get(i), global_row) for i in ids}
+
+
+def _precos_com_global(
+    preco: Optional[EntregadorPreco],
+    global_row: Optional[EntregadorPrecoGlobal],
+) -> Dict[str, Decimal]:
+    zero = Decimal("0.00")
+
     shopee_global = global_row.shopee_valor if global_row else zero
     ml_global = global_row.ml_valor if global_row else zero
     avulso_global = global_row.avulso_valor if global_row else zero
@@ -491,6 +565,7 @@ def create_entregador(
             db.add(new_user)
 
         db.commit()
+        invalidar_cache_entregador(sub_base_user)
         db.refresh(ent)
         return {"ok": True, "action": "created", "id": ent.id_entregador}
 
@@ -1588,6 +1663,7 @@ def patch_entregador(
             obj.coletador = coletador_desejado
 
         db.commit()
+        invalidar_cache_entregador(sub_base_user)
         db.refresh(obj)
         return obj
 
@@ -1736,4 +1812,5 @@ def delete_entregador(
     obj = _get_owned_entregador(db, sub_base_user, id_entregador)
     db.delete(obj)
     db.commit()
+    invalidar_cache_entregador(sub_base_user)
     return
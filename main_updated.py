@@ -3,6 +3,9 @@ from __future__ import annotations
 import os
 import time
 import logging
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, Response
@@ -36,7 +39,22 @@ else:
 
 # ──────────────────────────────────────────────────────────────────
 # App
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Rotas síncronas (def + Session) rodam no threadpool do anyio (padrão: 40 threads).
+    # Dimensiona pelo pool do banco para que bipagem concorrente use todas as conexões
+    # disponíveis em vez de enfileirar antes do pool.
+    from db import DB_POOL_SIZE, DB_MAX_OVERFLOW
+
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(limiter.total_tokens, DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    # Com lifespan= o Starlette ignora @app.on_event("startup"): a renovação de tokens roda aqui.
+    startup_event()
+    yield
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="API Saídas",
     version="1.8.0",
     openapi_url=f"{API_PREFIX}/openapi.json",
@@ -235,7 +253,6 @@ from ml_int_service import refresh_all_ml_int_tokens
 from shopee_routes import refresh_all_shopee_tokens
 from cleanup_service import run_history_cleanup, estimate_old_volume, _CleanupContext
 
-@app.on_event("startup")
 def startup_event():
     """Executa ao subir a API: renova todos os tokens ML Int e Shopee (agendamento)."""
     db = SessionLocal()
@@ -0,0 +1,12 @@
+-- Índices para coletas em lote e listagem de coletas em alto volume
+-- Execute manualmente em janela de manutenção (usa CONCURRENTLY).
+-- O índice (sub_base, codigo) de saidas, usado no check de duplicados do lote,
+-- já está em saidas_listar_performance_indexes.sql.
+
+-- GET /coletas e /coletas/resumo: filtro por sub_base ordenado/por faixa de timestamp
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_coletas_sub_base_timestamp
+  ON coletas (sub_base, timestamp DESC);
+
+-- Lookup de preços (BasePreco) por (sub_base, base) no POST /coletas/lote e fechamentos
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_base_sub_base_base
+  ON base (sub_base, base);
@@ -0,0 +1,10 @@
+-- Índice parcial para GET /coletas (listagem sem filtro de base)
+-- Execute manualmente em janela de manutenção (usa CONCURRENTLY).
+-- O predicado é o mesmo da consulta (coletas com alguma contagem ou valor), então o
+-- planner usa o índice e só percorre as coletas que a listagem devolve, já em ordem.
+-- Complementa ix_coletas_sub_base_timestamp (coletas_base_preco_indexes.sql), que continua
+-- servindo /coletas/resumo e os filtros por período sem esse predicado.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_coletas_sub_base_timestamp_nonzero
+  ON coletas (sub_base, timestamp DESC)
+  WHERE shopee > 0 OR mercado_livre > 0 OR avulso > 0 OR valor_total > 0;
@@ -0,0 +1,14 @@
+-- Índices complementares para GET /coletas (filtro por base) e /coletas/resumo
+-- Execute manualmente em janela de manutenção (usa CONCURRENTLY).
+-- Complementa coletas_base_preco_indexes.sql (coletas (sub_base, timestamp DESC)).
+
+-- GET /coletas?base=...: igualdade em sub_base + base e ORDER BY timestamp DESC sem sort
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_coletas_sub_base_base_timestamp
+  ON coletas (sub_base, base, timestamp DESC);
+
+-- /coletas/resumo: agregado de cancelados + pacotes G por dia/base.
+-- Parcial com o mesmo predicado da consulta (lower(status) = 'cancelado' OR is_grande IS true),
+-- então só entram as poucas saídas que interessam ao resumo.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_saidas_resumo_cancelado_g
+  ON saidas (sub_base, data)
+  WHERE lower(status) = 'cancelado' OR is_grande IS true;
@@ -0,0 +1,20 @@
+-- Índices para os filtros de base sem distinção de maiúsculas e para o recálculo de coleta
+-- Execute manualmente em janela de manutenção (usa CONCURRENTLY).
+-- Complementa coletas_base_preco_indexes.sql / coletas_resumo_indexes.sql, que já cobrem
+-- (sub_base, timestamp) e (sub_base, base, timestamp) em coletas e saidas_listar_performance_indexes.sql
+-- (saidas (sub_base, timestamp DESC)).
+
+-- /coletas/resumo?base=...: filtra lower(base) = :base; índice por expressão para não
+-- cair no (sub_base, timestamp) lendo todas as bases do período
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_coletas_sub_base_lower_base_timestamp
+  ON coletas (sub_base, lower(base), timestamp);
+
+-- Fechamento de base (preview/criação): filtra upper(base) = :base no período
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_coletas_sub_base_upper_base_timestamp
+  ON coletas (sub_base, upper(base), timestamp);
+
+-- recalcular_coleta (roda a cada UPDATE de Saida vinculada, via listener):
+-- contagem por serviço WHERE id_coleta = :id. FK não cria índice no Postgres.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_saidas_id_coleta
+  ON saidas (id_coleta)
+  WHERE id_coleta IS NOT NULL;
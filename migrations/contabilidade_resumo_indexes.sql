@@ -0,0 +1,21 @@
+-- Índices de cobertura para GET /contabilidade/resumo
+-- Execute manualmente em janela de manutenção (usa CONCURRENTLY). INCLUDE exige Postgres 11+.
+-- As colunas em INCLUDE são exatamente as lidas pelo resumo, então as somas de receita,
+-- a carga de saídas e a de fechamentos viram index-only scan (sem ler o heap).
+
+-- Receita: totais, rateio por serviço, por base e por dia (mesmo predicado de _COLETAS_NO_PERIODO)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_coletas_contabilidade_cobertura
+  ON coletas (sub_base, timestamp)
+  INCLUDE (shopee, mercado_livre, avulso, valor_total, base)
+  WHERE shopee > 0 OR mercado_livre > 0 OR avulso > 0 OR valor_total > 0;
+
+-- Saídas do período (status, serviço e ator resolvidos sem voltar à tabela)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_saidas_contabilidade_cobertura
+  ON saidas (sub_base, timestamp)
+  INCLUDE (id_saida, status, servico, entregador_id, motoboy_id, entregador)
+  WHERE codigo IS NOT NULL;
+
+-- Fechamentos que cruzam o período (periodo_inicio <= :fim AND periodo_fim >= :inicio)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_entregador_fechamentos_sub_base_periodo
+  ON entregador_fechamentos (sub_base, periodo_fim, periodo_inicio)
+  INCLUDE (id_entregador, id_motoboy, valor_final, status);
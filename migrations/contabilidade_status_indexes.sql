@@ -0,0 +1,11 @@
+-- Índices por expressão para os filtros de status do GET /contabilidade/resumo
+-- Execute manualmente em janela de manutenção (usa CONCURRENTLY).
+-- As consultas filtram lower(saidas.status) IN (...) e upper(entregador_fechamentos.status) IN (...);
+-- indexar a própria expressão deixa o predicado sargable sem coluna gerada nem mudança no model.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_saidas_sub_base_lower_status_timestamp
+  ON saidas (sub_base, lower(status), timestamp)
+  WHERE codigo IS NOT NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_entregador_fechamentos_sub_base_upper_status_periodo
+  ON entregador_fechamentos (sub_base, upper(status), periodo_fim);
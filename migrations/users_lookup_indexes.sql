@@ -0,0 +1,10 @@
+-- Índices para lookup de usuário por e-mail/username (login e resolução de sub_base)
+-- Execute manualmente em janela de manutenção (usa CONCURRENTLY).
+-- Se o banco já tiver UNIQUE em users.email / users.username, estes índices são redundantes
+-- (confira com \d users antes de rodar).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_email
+  ON users (email);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_username
+  ON users (username);
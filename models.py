@@ -19,7 +19,7 @@ from sqlalchemy.sql import func
 
 from db import Base
 from sqlalchemy import event
-from sqlalchemy.orm import Session, relationship
+from sqlalchemy.orm import Session, object_session, relationship
 
 
 # ==========================
@@ -794,7 +794,8 @@ def saida_after_update(mapper, connection, target: Saida):
         # Import atrasado para evitar circular import
         from coletas import recalcular_coleta
 
-        recalcular_coleta(db, target.id_coleta)
+        # Invalidação dos resumos fica para o commit da sessão que disparou o flush
+        recalcular_coleta(db, target.id_coleta, sessao_externa=object_session(target))
         db.commit()
     except Exception:
         db.rollback()
@@ -0,0 +1,112 @@
+"""
+Fixtures compartilhadas: banco SQLite em memória com as tabelas dos models e um app FastAPI
+montado só com o router testado (get_db e get_current_user sobrescritos).
+"""
+from __future__ import annotations
+
+import re
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import BigInteger, DefaultClause, MetaData, create_engine, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import auth
+import base
+import coletas
+import contabilidade_routes
+import entregador_routes
+import models  # noqa: F401  (registra as tabelas em Base.metadata)
+from db import Base, get_db
+
+
+@compiles(BigInteger, "sqlite")
+def _bigint_sqlite(type_, compiler, **kw):
+    # No SQLite só INTEGER PRIMARY KEY é autoincremento (rowid)
+    return "INTEGER"
+
+
+def _metadata_sqlite() -> MetaData:
+    """Cópia do metadata com os server_default do Postgres ('x'::text, CURRENT_DATE) adaptados."""
+    md = MetaData()
+    for tabela in Base.metadata.sorted_tables:
+        tabela.to_metadata(md)
+    for tabela in md.sorted_tables:
+        for col in tabela.columns:
+            sd = col.server_default
+            if sd is None or not hasattr(sd.arg, "text"):
+                continue
+            ajustado = re.sub(r"::[\w ]+", "", sd.arg.text).replace("CURRENT_DATE", "(CURRENT_DATE)")
+            if ajustado != sd.arg.text:
+                col.server_default = DefaultClause(text(ajustado))
+    return md
+
+
+_METADATA_SQLITE = _metadata_sqlite()
+
+# Caches por processo (dict de módulo) que sobrevivem entre testes
+_CACHES_DE_MODULO = (
+    coletas._resumo_cache,
+    coletas._base_preco_cache,
+    coletas._entregador_info_cache,
+    contabilidade_routes._resumo_cache,
+    entregador_routes._user_base_cache,
+    base._user_sub_base_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def _limpa_caches_de_modulo():
+    for cache in _CACHES_DE_MODULO:
+        cache.clear()
+    yield
+    for cache in _CACHES_DE_MODULO:
+        cache.clear()
+
+
+@pytest.fixture
+def engine():
+    eng = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    _METADATA_SQLITE.create_all(eng)
+    yield eng
+    eng.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def usuario():
+    """Usuário do JWT (auth stateless): sub_base e username vêm do token."""
+    return SimpleNamespace(id=1, username="joao", email="joao@x", role=1, sub_base="SB")
+
+
+@pytest.fixture
+def make_client(engine, usuario):
+    """Monta TestClient com os routers informados; cada request ganha sua própria sessão."""
+    sessoes = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+    def _get_db():
+        session = sessoes()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    def _make(*routers) -> TestClient:
+        app = FastAPI()
+        for r in routers:
+            app.include_router(r)
+        app.dependency_overrides[get_db] = _get_db
+        app.dependency_overrides[auth.get_current_user] = lambda: usuario
+        return TestClient(app)
+
+    return _make
@@ -88,3 +88,22 @@ def test_is_qr_like_shopee_digits():
 
 def test_is_qr_like_rejeita_truncado():
     assert is_qr_like_scan_payload("26561280188") is False
+
+
+def test_shopee_fast_path_minusculo_e_letra_final():
+    assert normalize_codigo("br2656127018725", strict_qr=True) == ("BR2656127018725", "Shopee", None)
+    assert normalize_codigo("BR265612701872X", strict_qr=True) == ("BR265612701872X", "Shopee", None)
+
+
+def test_payload_json_ml_parseado_uma_vez_no_fluxo_camera():
+    from unittest.mock import patch
+
+    import codigo_normalizer
+
+    payload = '{"id":"46012345678","sender_id":123,"hash_code":"abc"}'
+    codigo_normalizer._parse_json_payload.cache_clear()
+    with patch("codigo_normalizer.json.loads", wraps=codigo_normalizer.json.loads) as loads:
+        assert is_qr_like_scan_payload(payload) is True
+        c, servico, qr_raw = normalize_codigo(payload, strict_qr=True)
+    assert (c, servico, qr_raw) == ("46012345678", "Mercado Livre", payload)
+    assert loads.call_count == 1
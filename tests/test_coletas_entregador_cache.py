@@ -0,0 +1,49 @@
+"""Cache por-processo do entregador do usuário (coletas._resolve_entregador_info)."""
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import coletas
+from coletas import _resolve_entregador_info, invalidar_cache_entregador
+
+
+def _ent(sub_base, username, id_entregador=1):
+    return SimpleNamespace(
+        sub_base=sub_base, nome=username.title(), username_entregador=username, id_entregador=id_entregador, ativo=True
+    )
+
+
+def _user(sub_base, username):
+    return SimpleNamespace(sub_base=sub_base, username=username, id=1)
+
+
+def test_segunda_chamada_usa_cache():
+    with patch("coletas._fetch_entregador_com_precos", return_value=_ent("SB", "joao")) as fetch:
+        assert _resolve_entregador_info(MagicMock(), _user("SB", "joao")) == ("SB", "Joao", "joao", 1)
+        assert _resolve_entregador_info(MagicMock(), _user("SB", "joao")) == ("SB", "Joao", "joao", 1)
+    assert fetch.call_count == 1
+
+
+def test_cache_tem_teto_de_tamanho():
+    with patch.object(coletas, "_ENTREGADOR_CACHE_MAX", 3), patch(
+        "coletas._fetch_entregador_com_precos", return_value=None
+    ):
+        for i in range(10):
+            _resolve_entregador_info(MagicMock(), _user("SB", f"u{i}"))
+        assert len(coletas._entregador_info_cache) == 3
+        assert ("SB", "u9") in coletas._entregador_info_cache
+
+
+def test_invalidacao_descarta_so_a_sub_base():
+    with patch("coletas._fetch_entregador_com_precos", return_value=None):
+        _resolve_entregador_info(MagicMock(), _user("SB", "joao"))
+        _resolve_entregador_info(MagicMock(), _user("OUTRA", "maria"))
+    invalidar_cache_entregador("SB")
+    assert list(coletas._entregador_info_cache) == [("OUTRA", "maria")]
+
+
+def test_invalidacao_alcanca_entregador_gravado_sob_outra_sub_base():
+    # Token da sub_base "TOKEN", mas o Entregador (achado pelo username) é da sub_base "SB"
+    with patch("coletas._fetch_entregador_com_precos", return_value=_ent("SB", "joao")):
+        _resolve_entregador_info(MagicMock(), _user("TOKEN", "joao"))
+    invalidar_cache_entregador("SB")
+    assert coletas._entregador_info_cache == {}
@@ -0,0 +1,107 @@
+"""ETag/304 de GET /coletas nos dois caminhos (lista completa em streaming e página)."""
+import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+import coletas
+from models import Coleta
+
+
+@pytest.fixture
+def client(make_client, db):
+    for i in range(1, 6):
+        db.add(
+            Coleta(
+                sub_base="SB",
+                base="B1",
+                username_entregador="joao",
+                shopee=i,
+                mercado_livre=1,
+                avulso=0,
+                valor_total=Decimal(i) + Decimal("1.50"),
+                timestamp=datetime.datetime(2026, 1, i, 10),
+            )
+        )
+    db.add(Coleta(sub_base="OUTRA", base="B1", username_entregador="x", shopee=1, valor_total=Decimal("1")))
+    db.commit()
+    return make_client(coletas.router)
+
+
+def _contar_queries(engine):
+    n = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _conta(*_a):
+        n[0] += 1
+
+    return n
+
+
+@pytest.mark.parametrize("query", ["/coletas/?base=B1", "/coletas/?base=B1&limit=2"])
+def test_etag_e_304_nos_dois_caminhos(client, query):
+    r = client.get(query)
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+    assert etag.startswith('W/"')
+    assert r.headers["cache-control"] == "private, max-age=5"
+
+    r304 = client.get(query, headers={"If-None-Match": etag})
+    assert r304.status_code == 304
+    assert r304.content == b""
+    assert r304.headers["etag"] == etag
+    assert r304.headers["cache-control"] == "private, max-age=5"
+
+
+def test_lista_completa_muda_etag_ao_mover_quantidade_entre_coletas(client, db):
+    etag = client.get("/coletas/").headers["etag"]
+    # Somas do conjunto iguais, linhas diferentes
+    db.get(Coleta, 1).shopee += 1
+    db.get(Coleta, 2).shopee -= 1
+    db.commit()
+    r = client.get("/coletas/", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+
+
+def test_pagina_etag_cobre_campos_de_texto(client, db):
+    etag = client.get("/coletas/?limit=10").headers["etag"]
+    db.get(Coleta, 5).username_entregador = "maria"
+    db.commit()
+    r = client.get("/coletas/?limit=10", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    assert [c["username_entregador"] for c in r.json()][0] == "maria"
+
+
+def test_pagina_nao_roda_agregado_extra(client, engine):
+    n = _contar_queries(engine)
+    client.get("/coletas/?limit=2&offset=1")
+    assert n[0] == 1
+
+
+def test_etag_depende_da_pagina(client):
+    a = client.get("/coletas/?limit=2").headers["etag"]
+    b = client.get("/coletas/?limit=2&offset=2").headers["etag"]
+    assert a != b
+
+
+@pytest.mark.parametrize("query", ["/coletas/", "/coletas/?limit=2"])
+def test_if_none_match_com_lista_e_curinga(client, query):
+    etag = client.get(query).headers["etag"]
+    forte = etag[2:]
+    for cabecalho in (f'"outro", {etag}', f'W/"x",{forte}', "*"):
+        r = client.get(query, headers={"If-None-Match": cabecalho})
+        assert r.status_code == 304, cabecalho
+    assert client.get(query, headers={"If-None-Match": 'W/"outro", "x"'}).status_code == 200
+
+
+def test_if_none_match_confere():
+    confere = coletas._if_none_match_confere
+    assert confere('W/"a"', 'W/"a"')
+    assert confere('"a"', 'W/"a"')
+    assert confere(' "b" , W/"a"', 'W/"a"')
+    assert confere("*", 'W/"a"')
+    assert not confere(None, 'W/"a"')
+    assert not confere('W/"ab"', 'W/"a"')
@@ -0,0 +1,121 @@
+"""GET /coletas sem limit: array JSON em streaming, blocos de _LIST_COLETAS_STREAM_BLOCO e sessão."""
+import datetime as dt
+import json
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import event, insert
+
+import coletas
+from coletas import _LIST_COLETAS_BASE, _stream_coletas_json
+from models import Coleta
+
+N_COLETAS = 1203  # dois blocos cheios de 500 e um parcial
+
+
+def _inserir(db, n, sub_base="SB"):
+    inicio = dt.datetime(2026, 1, 1)
+    db.execute(
+        insert(Coleta),
+        [
+            {
+                "sub_base": sub_base,
+                "base": "B1",
+                "username_entregador": f"u{i % 7}",
+                "shopee": i % 5 + 1,
+                "mercado_livre": i % 3,
+                "avulso": 0,
+                "valor_total": Decimal(i) / 100,
+                "timestamp": inicio + dt.timedelta(minutes=i),
+            }
+            for i in range(n)
+        ],
+    )
+    db.commit()
+
+
+@pytest.fixture
+def client(make_client, db):
+    _inserir(db, N_COLETAS)
+    _inserir(db, 3, sub_base="OUTRA")
+    return make_client(coletas.router)
+
+
+def _db_espiao(db):
+    db.close = MagicMock(wraps=db.close)
+    return db
+
+
+def test_lista_completa_e_array_igual_as_paginas(client):
+    r = client.get("/coletas/")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/json"
+    itens = json.loads(r.content)
+    assert len(itens) == N_COLETAS
+    assert len({c["id_coleta"] for c in itens}) == N_COLETAS
+
+    paginas = client.get("/coletas/?limit=1000").json() + client.get("/coletas/?limit=1000&offset=1000").json()
+    assert itens == paginas
+    # Ordem por timestamp desc mantida através das fronteiras de bloco
+    assert [c["timestamp"] for c in itens] == sorted((c["timestamp"] for c in itens), reverse=True)
+
+
+def test_lista_completa_com_offset(client):
+    itens = client.get("/coletas/?offset=499").json()
+    assert len(itens) == N_COLETAS - 499
+    assert itens[0] == client.get("/coletas/?limit=1&offset=499").json()[0]
+
+
+@pytest.mark.parametrize("n, blocos", [(0, 0), (4, 2), (5, 3)])
+def test_blocos_emendados_com_virgula(db, n, blocos):
+    _inserir(db, n)
+    with patch.object(coletas, "_LIST_COLETAS_STREAM_BLOCO", 2):
+        partes = list(_stream_coletas_json(_db_espiao(db), _LIST_COLETAS_BASE, {"sub_base": "SB"}))
+    # "[" + blocos separados por "," + "]"
+    assert partes[0] == b"[" and partes[-1] == b"]"
+    assert partes[2:-1:2] == [b","] * max(blocos - 1, 0)
+    assert len(partes) == 2 + blocos + max(blocos - 1, 0)
+    assert len(json.loads(b"".join(partes))) == n
+
+
+def test_sessao_fechada_ao_consumir_todo_o_corpo(db):
+    _inserir(db, 3)
+    db = _db_espiao(db)
+    list(_stream_coletas_json(db, _LIST_COLETAS_BASE, {"sub_base": "SB"}))
+    db.close.assert_called_once()
+
+
+def test_sessao_fechada_quando_cliente_desconecta(db):
+    _inserir(db, 5)
+    db = _db_espiao(db)
+    with patch.object(coletas, "_LIST_COLETAS_STREAM_BLOCO", 2):
+        corpo = _stream_coletas_json(db, _LIST_COLETAS_BASE, {"sub_base": "SB"})
+        assert next(corpo) == b"["
+        next(corpo)
+        db.close.assert_not_called()
+        # Desconexão no meio do corpo: o servidor descarta o gerador (GeneratorExit no yield)
+        corpo.close()
+    db.close.assert_called_once()
+
+
+def test_sessao_fechada_quando_query_falha(db):
+    db = _db_espiao(db)
+    db.execute = MagicMock(side_effect=RuntimeError("conexão perdida"))
+    corpo = _stream_coletas_json(db, _LIST_COLETAS_BASE, {"sub_base": "SB"})
+    assert next(corpo) == b"["
+    with pytest.raises(RuntimeError):
+        next(corpo)
+    db.close.assert_called_once()
+
+
+def test_304_da_lista_completa_so_roda_o_agregado(client, engine):
+    r = client.get("/coletas/")
+    etag = r.headers["etag"]
+    assert r.headers["cache-control"] == "private, max-age=5"
+
+    queries = []
+    event.listen(engine, "before_cursor_execute", lambda *a: queries.append(a[2]))
+    r304 = client.get("/coletas/", headers={"If-None-Match": etag})
+    assert (r304.status_code, r304.headers["etag"], r304.content) == (304, etag, b"")
+    assert len(queries) == 1 and "count(" in queries[0].lower()
@@ -0,0 +1,102 @@
+"""POST /coletas/lote: ordem dos ids, duplicados (payload e banco), totais e linhas gravadas."""
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+
+import coletas
+from models import BasePreco, Coleta, Entregador, Owner, OwnerCobrancaItem, Saida, SaidaHistorico
+
+
+@pytest.fixture
+def client(make_client, db):
+    db.add_all([
+        BasePreco(sub_base="SB", base="B1", shopee=Decimal("1.10"), ml=Decimal("2.20"), avulso=Decimal("3.30")),
+        Owner(username="dono", email="dono@x", sub_base="SB", valor=Decimal("0.75")),
+        Entregador(
+            id_entregador=1, sub_base="SB", nome="João", username_entregador="joao", ativo=True, telefone="",
+            rua="", numero="", complemento="", cep="", cidade="", bairro="",
+        ),
+    ])
+    db.commit()
+    return make_client(coletas.router)
+
+
+def _lote(*itens, base="B1"):
+    return {
+        "base": base,
+        "entregador_id": 1,
+        "itens": [{"codigo": c, "servico": s} for c, s in itens],
+    }
+
+
+def _contar(db, modelo):
+    return db.scalar(select(func.count()).select_from(modelo))
+
+
+def test_lote_grava_coleta_saidas_historico_e_cobranca(client, db):
+    r = client.post(
+        "/coletas/lote",
+        json=_lote(("C3", "shopee"), ("C1", "mercado livre"), ("C2", "avulso"), ("C4", "ml")),
+    )
+    assert r.status_code == 201
+    body = r.json()
+
+    # Ids na ordem do payload (não na ordem dos códigos)
+    criadas = body["saidas_criadas"]
+    assert [s["codigo"] for s in criadas] == ["C3", "C1", "C2", "C4"]
+    ids = [s["id_saida"] for s in criadas]
+    assert ids == sorted(ids)
+    por_id = {s.id_saida: s for s in db.scalars(select(Saida))}
+    assert [por_id[i].codigo for i in ids] == ["C3", "C1", "C2", "C4"]
+
+    # Totais: 1,10 + 2 × 2,20 + 3,30 = 8,80
+    resumo = body["resumo"]
+    assert resumo["inseridos"] == 4
+    assert resumo["contagem"] == {"shopee": 1, "mercado_livre": 2, "avulso": 1}
+    assert resumo["total"] == "8.80"
+    coleta = db.scalar(select(Coleta))
+    assert (coleta.shopee, coleta.mercado_livre, coleta.avulso) == (1, 2, 1)
+    assert Decimal(str(coleta.valor_total)) == Decimal("8.80")
+    assert body["coleta"]["id_coleta"] == coleta.id_coleta
+
+    saida = por_id[ids[0]]
+    assert (saida.status, saida.entregador_id, saida.entregador, saida.id_coleta) == (
+        "coletado", 1, "João", coleta.id_coleta
+    )
+
+    historico = db.scalars(select(SaidaHistorico).order_by(SaidaHistorico.id_saida)).all()
+    assert [(h.id_saida, h.evento, h.status_novo, h.user_id) for h in historico] == [
+        (i, "criado_coleta", "coletado", 1) for i in ids
+    ]
+
+    cobranca = db.scalars(select(OwnerCobrancaItem).order_by(OwnerCobrancaItem.id_saida)).all()
+    assert [(c.id_saida, c.id_coleta, c.sub_base) for c in cobranca] == [(i, coleta.id_coleta, "SB") for i in ids]
+    assert {Decimal(str(c.valor)) for c in cobranca} == {Decimal("0.75")}
+
+
+def test_codigo_repetido_no_payload_da_409_sem_gravar(client, db):
+    r = client.post("/coletas/lote", json=_lote(("C1", "shopee"), (" C1 ", "avulso")))
+    assert r.status_code == 409
+    assert "C1" in r.json()["detail"]
+    assert _contar(db, Coleta) == _contar(db, Saida) == 0
+
+
+def test_codigo_ja_coletado_no_banco_da_409_sem_gravar(client, db):
+    db.add(Saida(sub_base="SB", codigo="C2", status="coletado"))
+    db.add(Saida(sub_base="OUTRA", codigo="C1", status="coletado"))  # outra sub_base não conflita
+    db.commit()
+
+    r = client.post("/coletas/lote", json=_lote(("C1", "shopee"), ("C2", "shopee")))
+    assert r.status_code == 409
+    assert r.json()["detail"] == "Código 'C2' já coletado."
+    assert _contar(db, Coleta) == 0
+    assert _contar(db, Saida) == 2
+    assert _contar(db, SaidaHistorico) == _contar(db, OwnerCobrancaItem) == 0
+
+
+def test_segundo_lote_com_mesmo_codigo_da_409(client, db):
+    assert client.post("/coletas/lote", json=_lote(("C1", "shopee"))).status_code == 201
+    r = client.post("/coletas/lote", json=_lote(("C9", "shopee"), ("C1", "shopee")))
+    assert r.status_code == 409
+    assert _contar(db, Coleta) == 1
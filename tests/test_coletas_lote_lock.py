@@ -0,0 +1,43 @@
+"""Advisory locks do POST /coletas/lote: poucos locks por lote, em ordem fixa."""
+from unittest.mock import MagicMock
+
+import coletas
+from coletas import _LOCK_BUCKETS, _buckets_codigos, _lock_codigos_lote
+
+
+def _db_postgres():
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "postgresql"
+    return db
+
+
+def test_lote_grande_trava_no_maximo_o_numero_de_buckets():
+    codigos = [f"BR{i:013d}" for i in range(5000)]
+    buckets = _buckets_codigos(codigos)
+    assert len(buckets) <= _LOCK_BUCKETS
+    assert buckets == sorted(set(buckets))
+    assert all(0 <= b < _LOCK_BUCKETS for b in buckets)
+
+
+def test_mesmo_codigo_cai_no_mesmo_bucket_em_qualquer_lote():
+    a = _buckets_codigos(["BR2656127018725"])
+    b = _buckets_codigos(["X1", "BR2656127018725", "Y2"])
+    assert set(a) <= set(b)
+    # crc32 é estável entre processos (hash() de str não é)
+    assert a == _buckets_codigos(["BR2656127018725"])
+
+
+def test_lock_executa_um_statement_com_buckets_ordenados():
+    db = _db_postgres()
+    _lock_codigos_lote(db, "SB", ["C3", "C1", "C2", "C1"])
+    db.execute.assert_called_once()
+    stmt, params = db.execute.call_args.args
+    assert stmt is coletas._LOCK_CODIGOS_SQL
+    assert params == {"sub_base": "SB", "buckets": _buckets_codigos(["C1", "C2", "C3"])}
+
+
+def test_lock_ignorado_fora_do_postgres():
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "sqlite"
+    _lock_codigos_lote(db, "SB", ["C1"])
+    db.execute.assert_not_called()
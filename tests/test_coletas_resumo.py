@@ -0,0 +1,236 @@
+"""
+GET /coletas/resumo: a agregação no banco (dia + base + entregador) tem que bater com a
+agregação coleta a coleta em Python que ela substituiu, e o cache cai após um lote.
+"""
+import datetime as dt
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+import coletas
+import contabilidade_routes
+from models import BaseFechamento, BasePreco, Coleta, Entregador, Owner, Saida
+
+
+def _ts(dia, hora=10, minuto=0):
+    return dt.datetime(2026, 3, dia, hora, minuto)
+
+
+def _coleta(ts, base, username, shopee=0, ml=0, avulso=0, valor="0", origem="codigo", pacotes_g=0, sub_base="SB"):
+    return Coleta(
+        sub_base=sub_base, base=base, username_entregador=username, shopee=shopee, mercado_livre=ml,
+        avulso=avulso, valor_total=Decimal(valor), origem=origem, pacotes_g=pacotes_g, timestamp=ts,
+    )
+
+
+def _saida(ts, base, status="saiu", is_grande=False, sub_base="SB"):
+    return Saida(sub_base=sub_base, base=base, timestamp=ts, data=ts.date(), status=status, is_grande=is_grande)
+
+
+@pytest.fixture
+def client(make_client, db):
+    db.add_all([
+        # Dia 1: mesma base em três grafias, dois entregadores e uma manual no meio
+        _coleta(_ts(1, 9), "B1", "joao", shopee=2, ml=1, valor="5.00"),
+        _coleta(_ts(1, 10), " b1", "maria", avulso=3, valor="6.30", pacotes_g=1),
+        _coleta(_ts(1, 11), "B1", "joao", shopee=1, valor="1.10"),
+        _coleta(_ts(1, 12), "B1 ", None, ml=2, valor="4.40"),
+        _coleta(_ts(1, 8), "B1", "ana", shopee=4, valor="4.40", origem="manual", pacotes_g=2),
+        _coleta(_ts(1, 13), "B2", "joao", ml=1, valor="2.20"),
+        # Dia 2: a coleta de B2 vem antes da de B1 (ordem dos itens no dia)
+        _coleta(_ts(2, 7), "b2", "maria", shopee=1, valor="1.10"),
+        _coleta(_ts(2, 8), "B1", "joao", shopee=1, valor="1.10"),
+        _coleta(_ts(2, 9), "B1", "ana", avulso=1, valor="3.30", origem="manual"),
+        # Dia 3 (última coleta do dia) e fora do filtro de datas / de outra sub_base
+        _coleta(_ts(3, 23, 59), "B1", "joao", shopee=1, valor="1.10"),
+        _coleta(_ts(4, 0), "B1", "joao", shopee=9, valor="9.90"),
+        _coleta(_ts(1, 10), "B1", "x", shopee=9, valor="9.90", sub_base="OUTRA"),
+        # Cancelados e G por (dia, BASE)
+        _saida(_ts(1, 14), "B1", status="cancelado"),
+        _saida(_ts(1, 15), " b1", status="CANCELADO", is_grande=True),
+        _saida(_ts(1, 16), "B1", is_grande=True),
+        _saida(_ts(1, 16), "B1"),
+        _saida(_ts(2, 10), "B2", status="cancelado"),
+        _saida(_ts(1, 14), "B1", status="cancelado", sub_base="OUTRA"),
+        BaseFechamento(
+            sub_base="SB", base="b1", periodo_inicio=dt.date(2026, 3, 1), periodo_fim=dt.date(2026, 3, 1),
+            status="FECHADO",
+        ),
+    ])
+    db.commit()
+    return make_client(coletas.router)
+
+
+def _resumo_coleta_a_coleta(db, base=None, data_inicio=None, data_fim=None):
+    """Algoritmo anterior: uma linha por coleta do banco, agrupamento todo em Python."""
+    stmt = select(Coleta).where(Coleta.sub_base == "SB").order_by(Coleta.timestamp)
+    coletas_ok = [
+        c for c in db.scalars(stmt)
+        if (base is None or (c.base or "").lower() == base.lower())
+        and (data_inicio is None or c.timestamp.date() >= data_inicio)
+        and (data_fim is None or c.timestamp.date() <= data_fim)
+    ]
+    cancelados, g_saidas = {}, {}
+    for s in db.scalars(select(Saida).where(Saida.sub_base == "SB")):
+        if base is not None and (s.base or "").lower() != base.lower():
+            continue
+        key = (s.timestamp.date().isoformat(), (s.base or "").strip().upper())
+        cancelados[key] = cancelados.get(key, 0) + ((s.status or "").lower() == "cancelado")
+        g_saidas[key] = g_saidas.get(key, 0) + bool(s.is_grande)
+
+    lista, agrupado = [], {}
+    for c in coletas_ok:
+        key = (c.timestamp.date().isoformat(), (c.base or "").strip().upper())
+        if c.origem == "manual":
+            lista.append({
+                "data": key[0], "base": key[1], "shopee": c.shopee, "mercado_livre": c.mercado_livre,
+                "avulso": c.avulso, "valor_total": Decimal(str(c.valor_total)),
+                "cancelados": cancelados.get(key, 0), "entregadores": {c.username_entregador or "-"},
+                "pacotes_g": c.pacotes_g + g_saidas.get(key, 0), "id_coleta": c.id_coleta, "origem": "manual",
+            })
+            continue
+        item = agrupado.setdefault(key, {
+            "data": key[0], "base": key[1], "shopee": 0, "mercado_livre": 0, "avulso": 0,
+            "valor_total": Decimal("0"), "cancelados": cancelados.get(key, 0), "entregadores": set(),
+            "pacotes_g": g_saidas.get(key, 0), "id_coleta": None, "origem": None,
+        })
+        item["shopee"] += c.shopee
+        item["mercado_livre"] += c.mercado_livre
+        item["avulso"] += c.avulso
+        item["valor_total"] += Decimal(str(c.valor_total))
+        item["entregadores"].add(c.username_entregador or "-")
+        item["pacotes_g"] += c.pacotes_g
+    lista.extend(agrupado.values())
+    lista.sort(key=lambda i: i["data"])
+    return lista
+
+
+def _itens_comparaveis(body):
+    # A ordem dos entregadores dentro do item vem de um set: compara como conjunto
+    return [
+        {
+            **{k: i[k] for k in ("data", "base", "shopee", "mercado_livre", "avulso", "cancelados",
+                                 "pacotes_g", "id_coleta", "origem")},
+            "valor_total": Decimal(i["valor_total"]),
+            "entregadores": set(i["entregadores"].split(" | ")),
+        }
+        for i in body["items"]
+    ]
+
+
+@pytest.mark.parametrize(
+    "filtros",
+    [
+        {},
+        {"base": "b1"},
+        {"data_inicio": dt.date(2026, 3, 1), "data_fim": dt.date(2026, 3, 3)},
+        {"base": "B2", "data_inicio": dt.date(2026, 3, 2), "data_fim": dt.date(2026, 3, 2)},
+    ],
+)
+def test_resumo_igual_ao_agrupamento_coleta_a_coleta(client, db, filtros):
+    body = client.get("/coletas/resumo", params={k: str(v) for k, v in filtros.items()}).json()
+    esperado = _resumo_coleta_a_coleta(db, **filtros)
+
+    assert _itens_comparaveis(body) == esperado
+    assert body["totalItems"] == len(esperado)
+    assert body["sumShopee"] == sum(i["shopee"] for i in esperado)
+    assert body["sumMercado"] == sum(i["mercado_livre"] for i in esperado)
+    assert body["sumAvulso"] == sum(i["avulso"] for i in esperado)
+    assert Decimal(body["sumValor"]) == sum(i["valor_total"] for i in esperado)
+    assert body["sumCancelados"] == sum(i["cancelados"] for i in esperado)
+
+
+def test_resumo_valores_do_dia_agrupado(client):
+    body = client.get("/coletas/resumo", params={"data_inicio": "2026-03-01", "data_fim": "2026-03-01"}).json()
+    manual, b1, b2 = body["items"]
+    assert (manual["origem"], manual["shopee"], manual["pacotes_g"], manual["cancelados"]) == ("manual", 4, 4, 2)
+    assert (b1["base"], b1["shopee"], b1["mercado_livre"], b1["avulso"]) == ("B1", 3, 3, 3)
+    assert Decimal(b1["valor_total"]) == Decimal("16.80")
+    assert set(b1["entregadores"].split(" | ")) == {"joao", "maria", "-"}
+    # G: 1 da coleta + 2 saídas grandes; fechamento FECHADO aparece como GERADO
+    assert (b1["pacotes_g"], b1["cancelados"], b1["fechamento_status"]) == (3, 2, "GERADO")
+    assert (b2["base"], b2["fechamento_status"], b2["id_fechamento"]) == ("B2", "PENDENTE", None)
+
+
+def test_resumo_paginado_mantem_totais_da_lista_inteira(client, db):
+    body = client.get("/coletas/resumo", params={"page": 2, "pageSize": 2}).json()
+    esperado = _resumo_coleta_a_coleta(db)
+    assert (body["totalItems"], body["totalPages"]) == (len(esperado), 4)
+    assert [i["data"] for i in body["items"]] == [i["data"] for i in esperado[2:4]]
+    assert body["sumShopee"] == sum(i["shopee"] for i in esperado)
+
+
+def test_lote_invalida_resumo_cacheado(client, db):
+    db.add_all([
+        BasePreco(sub_base="SB", base="B1", shopee=Decimal("1.10"), ml=Decimal("2.20"), avulso=Decimal("3.30")),
+        Owner(username="dono", email="dono@x", sub_base="SB", valor=Decimal("0.50")),
+        Entregador(
+            id_entregador=1, sub_base="SB", nome="João", username_entregador="joao", ativo=True, telefone="",
+            rua="", numero="", complemento="", cep="", cidade="", bairro="",
+        ),
+    ])
+    db.commit()
+    antes = client.get("/coletas/resumo").json()
+    # Sem escrita pela API o cache continua servindo o mesmo corpo
+    db.add(_coleta(_ts(5), "B1", "joao", shopee=1, valor="1.10"))
+    db.commit()
+    assert client.get("/coletas/resumo").json() == antes
+
+    r = client.post(
+        "/coletas/lote",
+        json={"base": "B1", "entregador_id": 1, "itens": [{"codigo": "Z1", "servico": "shopee"}]},
+    )
+    assert r.status_code == 201
+
+    # Recalculado: entram a coleta gravada por fora (dia 5) e a do lote (hoje)
+    depois = client.get("/coletas/resumo").json()
+    assert depois["sumShopee"] == antes["sumShopee"] + 2
+    assert depois["totalItems"] == antes["totalItems"] + 2
+
+
+@pytest.fixture
+def saida_com_coleta(db):
+    coleta = _coleta(_ts(6), "B1", "joao", shopee=1, valor="1.10")
+    db.add_all([coleta, BasePreco(sub_base="SB", base="B1", shopee=Decimal("1.10"), ml=Decimal("2.20"),
+                                  avulso=Decimal("3.30"))])
+    db.flush()
+    saida = Saida(sub_base="SB", base="B1", codigo="Q1", servico="shopee", status="coletado",
+                  id_coleta=coleta.id_coleta, timestamp=_ts(6), data=_ts(6).date())
+    db.add(saida)
+    db.commit()
+    return saida
+
+
+def _aquece_caches():
+    coletas._resumo_cache[("SB", "x")] = (float("inf"), b"{}")
+    contabilidade_routes._resumo_cache[("SB", "x")] = (float("inf"), b"{}")
+
+
+def test_recalculo_pelo_listener_invalida_so_apos_commit_real(db, saida_com_coleta):
+    _aquece_caches()
+    saida_com_coleta.servico = "mercado livre"
+    db.flush()  # listener recalcula a coleta numa sessão ligada à mesma conexão
+    # Transação ainda aberta: um resumo concorrente leria os totais antigos
+    assert ("SB", "x") in coletas._resumo_cache
+    db.commit()
+    assert coletas._resumo_cache == {}
+    assert contabilidade_routes._resumo_cache == {}
+    assert db.get(Coleta, saida_com_coleta.id_coleta).mercado_livre == 1
+
+
+def test_rollback_mantem_resumo_cacheado(db, saida_com_coleta):
+    _aquece_caches()
+    saida_com_coleta.servico = "avulso"
+    db.flush()
+    db.rollback()
+    assert ("SB", "x") in coletas._resumo_cache
+    db.commit()  # commit seguinte sem escrita não invalida nada pendurado
+    assert ("SB", "x") in coletas._resumo_cache
+
+
+def test_resumo_contabil_registrado_como_invalidador():
+    assert contabilidade_routes.invalidar_cache_contabilidade in coletas._invalidadores_resumo
+    _aquece_caches()
+    coletas.invalidar_cache_resumo("SB")
+    assert contabilidade_routes._resumo_cache == {}
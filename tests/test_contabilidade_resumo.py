@@ -0,0 +1,247 @@
+"""GET /contabilidade/resumo sobre um cenário pequeno, com os valores calculados à mão."""
+import datetime as dt
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+import contabilidade_routes
+from models import (
+    Coleta,
+    Entregador,
+    EntregadorFechamento,
+    EntregadorPreco,
+    EntregadorPrecoGlobal,
+    Saida,
+    SaidaHistorico,
+)
+
+URL = "/contabilidade/resumo?data_inicio=2026-01-01&data_fim=2026-01-10"
+
+
+def _ts(dia, hora=10, mes=1, ano=2026, **kw):
+    return dt.datetime(ano, mes, dia, hora, **kw)
+
+
+def _entregador(id_entregador, nome):
+    return Entregador(
+        id_entregador=id_entregador, sub_base="SB", nome=nome, telefone="", rua="", numero="",
+        complemento="", cep="", cidade="", bairro="",
+    )
+
+
+def _coleta(base, valor, ts, shopee=0, ml=0, avulso=0, sub_base="SB"):
+    return Coleta(
+        sub_base=sub_base, base=base, username_entregador="joao", shopee=shopee, mercado_livre=ml,
+        avulso=avulso, valor_total=Decimal(valor), timestamp=ts,
+    )
+
+
+def _saida(id_saida, ts, servico, status="saiu", sub_base="SB", codigo="X", **ator):
+    return Saida(
+        id_saida=id_saida, sub_base=sub_base, timestamp=ts, data=ts.date(), servico=servico,
+        status=status, codigo=codigo and f"{codigo}{id_saida}", **ator,
+    )
+
+
+def _fechamento(inicio, fim, valor, status="GERADO", sub_base="SB", **ator):
+    return EntregadorFechamento(
+        sub_base=sub_base, periodo_inicio=inicio, periodo_fim=fim, valor_final=Decimal(valor),
+        status=status, **ator,
+    )
+
+
+@pytest.fixture
+def client(make_client, db):
+    """
+    Janela 01–10/01/2026, sub_base SB. Preço global 2,00/3,00/4,00; entregador 1 tem shopee
+    próprio (1,50); entregador 2 e o motoboy 7 usam o global.
+    """
+    db.add_all([
+        _entregador(1, "João Silva"),
+        _entregador(2, "Maria"),
+        EntregadorPrecoGlobal(sub_base="SB", shopee_valor=Decimal("2.00"), ml_valor=Decimal("3.00"),
+                              avulso_valor=Decimal("4.00")),
+        EntregadorPreco(id_entregador=1, shopee_valor=Decimal("1.50"), usa_preco_global=False),
+        # Receita: 8,00 (4 shopee + 2 ml + 2 avulso) + 6,00 ml + 2,50 shopee = 16,50
+        _coleta("B1", "8.00", _ts(2), shopee=2, ml=1, avulso=1),
+        _coleta(" b1", "6.00", _ts(5), ml=3),
+        _coleta("B2", "2.50", _ts(10, 23, minute=59, second=59), shopee=1),
+        _coleta("B1", "99.00", _ts(11, 0), shopee=1),  # fora da janela
+        _coleta("B1", "50.00", _ts(3), shopee=1, sub_base="OUTRA"),
+        _coleta("B1", "5.00", _ts(28, mes=12, ano=2025), shopee=1),  # período anterior
+        # Saídas contadas (7): pendentes 1,50 + 3,00 + 2,00 + 3,00 + 1,50 + 2,00 = 13,00
+        _saida(1, _ts(3), "shopee", entregador_id=1),
+        _saida(2, _ts(4), "mercado livre", entregador_id=1),
+        _saida(3, _ts(5), "avulso", entregador_id=2),  # coberta pelo fechamento 01–07
+        _saida(4, _ts(8), "shopee", entregador_id=2),
+        _saida(5, _ts(9), "ml", motoboy_id=7),
+        _saida(6, _ts(6), "shopee", entregador="joao silva"),  # legado: resolve pelo nome
+        # Registro em 06/01 (coberto), leitura em 09/01: pendente pela data operacional
+        _saida(8, _ts(6), "shopee", entregador_id=2),
+        # Não contam
+        _saida(7, _ts(10, 20), "shopee", entregador_id=1),  # data operacional 11/01
+        _saida(9, _ts(3), "shopee", status="cancelado", entregador_id=1),
+        _saida(10, _ts(3), "shopee", codigo=None, entregador_id=1),
+        _saida(11, _ts(3), "shopee", sub_base="OUTRA", entregador_id=1),
+        SaidaHistorico(id_saida=7, evento="lido", timestamp=_ts(11, 8)),
+        SaidaHistorico(id_saida=8, evento="lido", timestamp=_ts(9, 8)),
+        # Confirmada: 14,00 (2,00/dia). PENDENTE e OUTRA não entram.
+        _fechamento(dt.date(2026, 1, 1), dt.date(2026, 1, 7), "14.00", id_entregador=2),
+        _fechamento(dt.date(2026, 1, 1), dt.date(2026, 1, 10), "30.00", status="PENDENTE", id_entregador=1),
+        _fechamento(dt.date(2026, 1, 1), dt.date(2026, 1, 10), "30.00", sub_base="OUTRA", id_entregador=1),
+        _fechamento(dt.date(2025, 12, 20), dt.date(2025, 12, 31), "7.00", id_entregador=2),
+    ])
+    db.commit()
+    return make_client(contabilidade_routes.router)
+
+
+def test_preco_de_motoboy_com_falha_vira_zero(client):
+    with patch.object(contabilidade_routes, "resolver_precos_motoboy", side_effect=RuntimeError("db")):
+        r = client.get(URL)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["despesas_pendentes"] == "10.00"
+    moto = next(d for d in body["distribuicao_despesas"] if d["id_motoboy"] == 7)
+    assert moto["despesa"] == "0.00"
+
+
+def test_precos_de_entregadores_com_falha_viram_zero(client):
+    with patch.object(contabilidade_routes, "resolver_precos_entregadores", side_effect=RuntimeError("db")):
+        r = client.get(URL)
+    assert r.status_code == 200
+    body = r.json()
+    # Só o motoboy (preço global) continua com despesa pendente
+    assert body["despesas_pendentes"] == "3.00"
+    assert body["despesas_confirmadas"] == "14.00"
+
+
+def test_totais_e_indicadores(client):
+    body = client.get(URL).json()
+    assert {k: body[k] for k in ("receita_bruta", "despesas_confirmadas", "despesas_pendentes",
+                                 "despesas_totais", "lucro_liquido", "margem_liquida")} == {
+        "receita_bruta": "16.50",
+        "despesas_confirmadas": "14.00",
+        "despesas_pendentes": "13.00",
+        "despesas_totais": "27.00",
+        "lucro_liquido": "-10.50",
+        "margem_liquida": "-63.64",
+    }
+    assert body["indicadores"] == {
+        "total_coletas": 8,
+        "total_saidas": 7,
+        "ticket_medio_coleta": "2.06",
+        "custo_medio_saida": "3.86",
+        "lucro_por_pacote": "-1.31",
+        "taxa_conversao": "87.50",
+    }
+    assert body["total_fechamentos_no_periodo"] == 1
+    assert body["aviso_pendentes"] is False
+
+
+def test_receita_e_despesa_por_servico(client):
+    por_servico = {s["servico"]: s for s in client.get(URL).json()["analise_por_servico"]}
+    resumo = {k: (s["coletas"], s["saidas"], s["receita"], s["despesa"]) for k, s in por_servico.items()}
+    # Despesa total rateada pelas saídas: 27,00 × 4/7, × 2/7, × 1/7
+    assert resumo == {
+        "shopee": (3, 4, "6.50", "15.43"),
+        "mercado_livre": (4, 2, "8.00", "7.71"),
+        "avulso": (1, 1, "2.00", "3.86"),
+    }
+
+
+def test_rentabilidade_por_base_normaliza_nome(client):
+    bases = client.get(URL).json()["rentabilidade_por_base"]
+    # " b1" soma em B1; despesa rateada pela receita; ordem por lucro
+    assert [(b["base"], b["receita"], b["despesa"], b["lucro"]) for b in bases] == [
+        ("B2", "2.50", "4.09", "-1.59"),
+        ("B1", "14.00", "22.91", "-8.91"),
+    ]
+
+
+def test_distribuicao_de_despesas_por_ator(client):
+    dist = client.get(URL).json()["distribuicao_despesas"]
+    assert [(d["id_entregador"], d["id_motoboy"], d["nome"], d["saidas"], d["despesa"], d["percentual"])
+            for d in dist] == [
+        (2, None, "Maria", 3, "18.00", "66.67"),  # 14,00 confirmada + 4,00 pendente
+        (1, None, "João Silva", 3, "6.00", "22.22"),  # inclui a saída legada resolvida pelo nome
+        (None, 7, "Motoboy 7", 1, "3.00", "11.11"),
+    ]
+
+
+def test_evolucao_diaria(client):
+    evolucao = client.get(URL).json()["evolucao_diaria"]
+    assert [(e["date"][-2:], e["ganhos"], e["despesas"]) for e in evolucao] == [
+        ("01", "0.00", "2.00"),
+        ("02", "8.00", "2.00"),
+        ("03", "0.00", "3.50"),
+        ("04", "0.00", "5.00"),
+        ("05", "6.00", "2.00"),  # saída 3 coberta pelo fechamento: só o rateio
+        ("06", "0.00", "3.50"),  # saída 8 coberta na data do registro: fora do dia
+        ("07", "0.00", "2.00"),
+        ("08", "0.00", "2.00"),
+        ("09", "0.00", "3.00"),
+        ("10", "2.50", "0.00"),  # coleta 23:59:59 entra; saída 7 não (data operacional 11/01)
+    ]
+    # A saída 8 conta na despesa pendente (data operacional) mas não na evolução (data do registro)
+    assert sum(Decimal(e["despesas"]) for e in evolucao) == Decimal("25.00")
+
+
+def test_data_operacional_fora_da_janela_nao_conta(client):
+    # Mesma janela terminando em 11/01: a saída 7 passa a contar (leitura em 11/01)
+    url = "/contabilidade/resumo?data_inicio=2026-01-02&data_fim=2026-01-11"
+    body = client.get(url).json()
+    assert body["indicadores"]["total_saidas"] == 8
+    joao = next(d for d in body["distribuicao_despesas"] if d["id_entregador"] == 1)
+    assert (joao["saidas"], joao["despesa"]) == (4, "7.50")
+
+
+def test_fechamento_cobrindo_data_operacional_tira_da_pendente(client, db):
+    # Fechamento de 08–09/01 da entregadora 2 cobre a leitura da saída 8 e a saída 4
+    db.add(_fechamento(dt.date(2026, 1, 8), dt.date(2026, 1, 9), "6.00", status="REAJUSTADO", id_entregador=2))
+    db.commit()
+    body = client.get(URL).json()
+    assert body["despesas_pendentes"] == "9.00"
+    assert body["despesas_confirmadas"] == "20.00"
+    assert body["total_fechamentos_no_periodo"] == 2
+
+
+def test_comparacao_periodo_anterior(client):
+    comp = client.get(URL).json()["comparacao_periodo_anterior"]
+    # 22–31/12/2025: coleta de 5,00 e fechamento 20–31/12 (sobrepõe o período) de 7,00
+    assert comp == {
+        "receita_anterior": "5.00",
+        "despesa_anterior": "7.00",
+        "lucro_anterior": "-2.00",
+        "margem_anterior": "-40.00",
+        "variacao_receita_pct": "230.00",
+        "variacao_despesa_pct": "285.71",
+        "variacao_lucro_pct": "425.00",
+        "variacao_margem_pp": "-23.64",
+    }
+
+
+def test_modo_entregue_conta_so_status_entregue(client, db):
+    db.get(Saida, 4).status = "entregue"
+    db.commit()
+    body = client.get(URL + "&modo_entregas=entregue").json()
+    assert body["indicadores"]["total_saidas"] == 1
+    assert body["despesas_pendentes"] == "2.00"
+
+
+def test_cobertura_mescla_fechamentos_sobrepostos_e_contiguos():
+    Fech = EntregadorFechamento
+    d = dt.date
+    rows = [
+        Fech(id_entregador=1, periodo_inicio=d(2026, 1, 5), periodo_fim=d(2026, 1, 9)),
+        Fech(id_entregador=1, periodo_inicio=d(2026, 1, 1), periodo_fim=d(2026, 1, 6)),
+        Fech(id_entregador=1, periodo_inicio=d(2026, 1, 10), periodo_fim=d(2026, 1, 10)),
+        Fech(id_entregador=1, periodo_inicio=d(2026, 1, 20), periodo_fim=d(2026, 1, 19)),  # invertido: ignora
+        Fech(id_motoboy=7, id_entregador=1, periodo_inicio=d(2026, 1, 15), periodo_fim=d(2026, 1, 15)),
+    ]
+    cobertura = contabilidade_routes._montar_cobertura(rows)
+    assert cobertura[("e", 1)] == ([d(2026, 1, 1)], [d(2026, 1, 10)])
+    coberto = contabilidade_routes._dia_coberto
+    assert [coberto(cobertura, ("e", 1), d(2026, 1, n)) for n in (1, 10, 11, 15)] == [True, True, False, False]
+    assert coberto(cobertura, ("m", 7), d(2026, 1, 15))
+    assert not coberto(cobertura, ("m", 8), d(2026, 1, 15))
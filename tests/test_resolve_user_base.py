@@ -0,0 +1,45 @@
+"""Resolução da sub_base nas rotas de entregador/fechamento (claim do JWT x users.sub_base)."""
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+from entregador_routes import _resolve_user_base
+
+
+def _db(sub_base_no_banco):
+    db = MagicMock()
+    db.scalar.return_value = sub_base_no_banco
+    return db
+
+
+def test_usuario_web_usa_claim_sem_select():
+    db = _db("OUTRA")
+    user = SimpleNamespace(id=1, username="admin", role=1, sub_base="SB")
+    assert _resolve_user_base(db, user) == "SB"
+    db.scalar.assert_not_called()
+
+
+@pytest.mark.parametrize("role", [4, "4"])
+def test_motoboy_ignora_claim_da_sub_base_selecionada(role):
+    db = _db("SB_USERS")
+    user = SimpleNamespace(id=7, username="moto", role=role, sub_base="SB_SELECIONADA")
+    assert _resolve_user_base(db, user) == "SB_USERS"
+    db.scalar.assert_called_once()
+
+
+def test_token_sem_claim_consulta_banco_com_cache():
+    db = _db("SB")
+    user = SimpleNamespace(id=1, username="admin", role=1, sub_base=None)
+    assert _resolve_user_base(db, user) == "SB"
+    assert _resolve_user_base(db, user) == "SB"
+    db.scalar.assert_called_once()
+
+
+def test_sem_sub_base_no_banco_retorna_400():
+    db = _db(None)
+    user = SimpleNamespace(id=1, username="admin", role=4, sub_base="SB")
+    with pytest.raises(HTTPException) as exc:
+        _resolve_user_base(db, user)
+    assert exc.value.status_code == 400
@@ -0,0 +1,29 @@
+"""Startup da API: lifespan dimensiona o threadpool e renova tokens ML Int/Shopee."""
+from unittest.mock import patch
+
+import anyio.to_thread
+from fastapi.testclient import TestClient
+
+import main_updated
+from db import DB_MAX_OVERFLOW, DB_POOL_SIZE
+
+
+def test_lifespan_renova_tokens_no_startup():
+    with patch("main_updated.refresh_all_ml_int_tokens") as ml, patch(
+        "main_updated.refresh_all_shopee_tokens"
+    ) as shopee:
+        with TestClient(main_updated.app) as client:
+            limite = client.portal.call(
+                lambda: anyio.to_thread.current_default_thread_limiter().total_tokens
+            )
+    assert ml.call_count == 1
+    assert shopee.call_count == 1
+    assert limite >= DB_POOL_SIZE + DB_MAX_OVERFLOW
+
+
+def test_falha_na_renovacao_nao_derruba_startup():
+    with patch("main_updated.refresh_all_ml_int_tokens", side_effect=RuntimeError("ml fora")), patch(
+        "main_updated.refresh_all_shopee_tokens", side_effect=RuntimeError("shopee fora")
+    ):
+        with TestClient(main_updated.app) as client:
+            assert client.get(f"{main_updated.API_PREFIX}/health").status_code == 200
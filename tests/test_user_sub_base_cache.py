@@ -0,0 +1,47 @@
+"""Cache da sub_base do usuário (base.py / entregador_routes.py): teto e invalidação."""
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import base
+import entregador_routes
+import users_routes_updated
+from base import _resolve_user_sub_base
+
+
+def _db(sub_base="SB"):
+    db = MagicMock()
+    db.scalar.return_value = sub_base
+    return db
+
+
+def _aquece(user_id=5, username="ana", email="ana@x"):
+    user = SimpleNamespace(id=user_id, username=username, email=email, role=4, sub_base="SB")
+    _resolve_user_sub_base(_db(), user)
+    entregador_routes._resolve_user_base(_db(), user)
+
+
+def test_cache_tem_teto_de_tamanho():
+    with patch.object(base, "_USER_SUB_BASE_CACHE_MAX", 2):
+        for i in range(5):
+            _resolve_user_sub_base(_db(), SimpleNamespace(id=i, username=f"u{i}", email=None))
+        assert len(base._user_sub_base_cache) == 2
+
+
+def test_delete_user_descarta_sub_base_cacheada():
+    _aquece(user_id=5)
+    _aquece(user_id=6, username="bia", email="bia@x")
+    alvo = SimpleNamespace(id=5, username="ana", email="ana@x", sub_base="SB")
+    db = MagicMock()
+    db.get.return_value = alvo
+    admin = SimpleNamespace(id=1, role=1, sub_base="SB")
+
+    users_routes_updated.delete_user(5, db=db, current_user=admin)
+
+    assert [k[0] for k in base._user_sub_base_cache] == [6]
+    assert [k[0] for k in entregador_routes._user_base_cache] == [6]
+
+
+def test_invalidacao_por_username_sem_id_no_token():
+    entregador_routes._resolve_user_base(_db(), SimpleNamespace(id=None, username="ana", role=4, sub_base="SB"))
+    entregador_routes.invalidar_cache_user_base(5, "ana@x", "ana")
+    assert entregador_routes._user_base_cache == {}
@@ -17,7 +17,8 @@ from db import get_db
 from name_normalizer import normalize_person_name
 from auth import get_current_user, get_password_hash, verify_password, DEFAULT_PASSWORD, revoke_motoboy_refresh_tokens_for_user
 from models import User, Owner, Motoboy, MotoboySubBase
-from base import _resolve_user_sub_base
+from base import _resolve_user_sub_base, invalidar_cache_user_sub_base
+from entregador_routes import invalidar_cache_user_base
 
 router = APIRouter(prefix="/users", tags=["Users"])
 logger = logging.getLogger("routes.users")
@@ -784,6 +785,12 @@ def get_user(
 # PATCH /users/{id} — Atualização ADMIN
 # ============================================================
 
+def _invalidar_sub_base_cacheada(user_id: int, *identificadores: Optional[str]) -> None:
+    """Descarta a sub_base cacheada do usuário (base.py e entregador_routes) após editar/excluir."""
+    invalidar_cache_user_sub_base(user_id, *identificadores)
+    invalidar_cache_user_base(user_id, *identificadores)
+
+
 @router.patch("/{user_id}", response_model=UserOut)
 def admin_update_user(
     user_id: int,
@@ -805,6 +812,7 @@ def admin_update_user(
 
     owner = db.scalar(select(Owner).where(Owner.sub_base == current_user.sub_base))
     updates = payload.model_dump(exclude_unset=True)
+    identificadores_antigos = (user.email, user.username)
 
     # ROLE → define COLETADOR (legado)
     if "role" in updates:
@@ -925,6 +933,7 @@ def admin_update_user(
             raise HTTPException(409, "Contato já existe para esta sub_base.")
         logger.exception("Erro de integridade ao atualizar usuário id=%s: %s", user_id, e)
         raise HTTPException(409, "Conflito de dados ao atualizar usuário.")
+    _invalidar_sub_base_cacheada(user_id, *identificadores_antigos)
 
     db.refresh(user)
     return _user_to_out(user)
@@ -977,8 +986,10 @@ def delete_user(
     if user.sub_base != current_user.sub_base:
         raise HTTPException(403, "Acesso negado.")
 
+    identificadores = (user.email, user.username)
     db.delete(user)
     db.commit()
+    _invalidar_sub_base_cacheada(user_id, *identificadores)
     return {"ok": True, "deleted": user_id}
 
 